@@ -0,0 +1,86 @@
+# run.py
+"""
+Stage-level benchmarks on synthetic workbooks.
+
+    python -m benchmarks.run                       # default grid
+    python -m benchmarks.run --months 120 1200 --factors 20 500 --repeat 3 -o bench.json
+
+Each stage is timed `repeat` times (min/median seconds), then run once more
+under tracemalloc for its peak allocation. Results go to a JSON file together
+with the git revision so runs can be compared between commits.
+"""
+import argparse, io, json, os, platform, statistics, subprocess, sys, tempfile, time, tracemalloc
+import numpy as np, pandas as pd
+
+from src import data_ingest, pca as pca_mod, regimes as regimes_mod, metrics, exporters, report
+from src.backtest import hy_ig_strategy
+from .synthetic import make_workbook
+
+def _workbook(months, factors, seed=0):
+    """Generated workbooks are reused across runs (writing a large one is slow)."""
+    path = os.path.join(tempfile.gettempdir(), f'pca_bench_{months}x{factors}_{seed}.xlsx')
+    if not os.path.exists(path):
+        with open(path, 'wb') as fh: fh.write(make_workbook(months, factors, seed))
+    with open(path, 'rb') as fh: return fh.read()
+
+def _pdf(ctx):
+    report.clear_cache()   # time the rendering, not the figure cache
+    return report.build_report(ctx['returns'], ctx['regime'], ctx['PC'], loadings=ctx['loadings'])
+
+def stages(xls: bytes, minp_z: int = 24, solver: str = 'auto'):
+    """Yield (name, fn) in pipeline order; later stages use earlier outputs."""
+    ctx = {}
+    RAW = pd.read_excel(io.BytesIO(xls), sheet_name='Inputs', engine='openpyxl')   # untimed input for z_construction
+    def parse():
+        ctx['sheets'], ctx['Z'], ctx['returns'] = data_ingest.parse_workbook(xls, minp_z=minp_z, backend='openpyxl')
+    def parse_pandas():
+        xf = data_ingest.read_excel_bytes(xls); data_ingest.load_variables(xf, minp_z=minp_z); data_ingest.load_returns(xf)
+    def expanding_pca():
+        ctx['PC'], ctx['EVR'], ctx['loadings'] = pca_mod.expanding_pca_2(ctx['Z'], solver=solver); ctx['regime'] = regimes_mod.compute_regime(ctx['PC']).dropna()
+    yield 'excel_parse', parse
+    yield 'excel_parse_pandas', parse_pandas
+    yield 'z_construction', lambda: data_ingest._z_from_raw(RAW, minp_z)
+    yield 'expanding_pca', expanding_pca
+    yield 'loadings_timeline', lambda: pca_mod.expanding_loadings_timeline(ctx['Z'], solver=solver)
+    yield 'compute_regime', lambda: regimes_mod.compute_regime(ctx['PC'])
+    def run_metrics():
+        res = hy_ig_strategy(ctx['returns'], ctx['regime']); s, b = res['strat_ret'], res['bench_ret']
+        metrics.rolling_excess(s, b); metrics.rolling_te_ir(s, b); metrics.calendar_returns(s, b); metrics.cumulative_excess(s, b)
+    yield 'metrics', run_metrics
+    yield 'pdf_export', lambda: _pdf(ctx)
+    yield 'excel_export', lambda: (exporters.export_labels_basic(ctx['returns'], ctx['regime']),
+                                   exporters.export_labels_strategy(ctx['returns'], ctx['regime']))
+
+def bench_case(months, factors, repeat=3, solver='auto'):
+    xls = _workbook(months, factors); out = []
+    for name, fn in stages(xls, solver=solver):
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter(); fn(); times.append(time.perf_counter() - t0)
+        tracemalloc.start(); fn(); _, peak = tracemalloc.get_traced_memory(); tracemalloc.stop()
+        out.append({'months': months, 'factors': factors, 'stage': name, 'min_s': min(times),
+                    'median_s': statistics.median(times), 'peak_mb': peak/2**20, 'repeat': repeat, 'solver': solver})
+        print(f'{months:>5} x {factors:<4} {name:<20} {min(times):9.4f}s  {peak/2**20:8.1f} MB', file=sys.stderr)
+    return out
+
+def _revision():
+    try: return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception: return ''
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--months', type=int, nargs='+', default=[120, 360])
+    ap.add_argument('--factors', type=int, nargs='+', default=[20, 100])
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--solver', choices=pca_mod.SOLVERS, default='auto', help='PCA eigensolver (see src/pca.py)')
+    ap.add_argument('-o', '--out', default='bench_results.json')
+    a = ap.parse_args(argv)
+    results = [r for m in a.months for f in a.factors for r in bench_case(m, f, a.repeat, a.solver)]
+    meta = {'revision': _revision(), 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'pandas': pd.__version__, 'machine': platform.machine(), 'cpus': os.cpu_count()}
+    with open(a.out, 'w', encoding='utf-8') as fh: json.dump({'meta': meta, 'results': results}, fh, indent=2)
+    print(pd.DataFrame(results).pivot_table(index=['months', 'factors'], columns='stage', values='min_s').round(4).to_string())
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,47 @@
+# synthetic.py
+"""
+Synthetic monthly workbooks laid out like the production file: an 'X-Scores'
+tab (title rows, then a Date header row, a leading all-zero row), a raw
+'Inputs' tab and a 'Returns' tab with level columns followed by the monthly
+return columns that pandas names 'EMBI GD HY.1' etc.
+"""
+import datetime as dt, io
+import numpy as np
+from openpyxl import Workbook
+
+ANCHORS = ['SPX Index', 'USGG10Y Index']
+
+def factor_names(n: int) -> list:
+    return (ANCHORS + [f'F{i:03d} Index' for i in range(n - len(ANCHORS))])[:n]
+
+def month_ends(months: int, start=(1995, 1)) -> list:
+    y, m = start; out = []
+    for _ in range(months):
+        ny, nm = (y + 1, 1) if m == 12 else (y, m + 1)
+        out.append(dt.datetime(ny, nm, 1) - dt.timedelta(days=1)); y, m = ny, nm
+    return out
+
+def make_workbook(months: int = 240, factors: int = 40, seed: int = 0, n_drivers: int = 3) -> bytes:
+    """Return .xlsx bytes with `months` rows and `factors` series driven by a few common factors."""
+    rng = np.random.default_rng(seed); dates = month_ends(months); names = factor_names(factors)
+    F = rng.standard_normal((months, n_drivers)).cumsum(axis=0)*0.2
+    raw = 100 + F @ rng.standard_normal((n_drivers, factors)) + rng.standard_normal((months, factors)).cumsum(axis=0)*0.5
+    mu = np.cumsum(raw, axis=0)/np.arange(1, months+1)[:, None]
+    z = np.round((raw - mu)/raw.std(axis=0), 4)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('X-Scores')
+    ws.append(['Synthetic PCA inputs']); ws.append([])
+    ws.append(['Date'] + names)
+    ws.append([dates[0] - dt.timedelta(days=31)] + [0.0]*factors)
+    for d, row in zip(dates, z): ws.append([d] + row.tolist())
+
+    ws = wb.create_sheet('Inputs'); ws.append(['Date'] + names)
+    for d, row in zip(dates, raw): ws.append([d] + row.round(4).tolist())
+
+    ws = wb.create_sheet('Returns')
+    ws.append(['Date', 'EMBI GD HY', 'EMBI GD IG', 'EMBI GD', None, 'Date', None, 'EMBI GD HY', None, 'EMBI GD IG', None, 'EMBI GD'])
+    r = rng.normal([0.006, 0.004, 0.005], [0.03, 0.015, 0.02], (months, 3)); lv = 100*np.cumprod(1 + r, axis=0)
+    for d, l, x in zip(dates, lv, r):
+        ws.append([d, *l.round(4).tolist(), None, d, None, x[0], None, x[1], None, x[2]])
+    buf = io.BytesIO(); wb.save(buf); return buf.getvalue()
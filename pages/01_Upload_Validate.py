@@ -1,31 +1,44 @@
 import streamlit as st
-from src.utils import file_hash
+from src.utils import file_hash, bytes_hash
 from src import data_ingest
+from src import cache as disk_cache
+from src import instrument
+from src import jobs
+from src import registry
 
 st.title('Upload & Validate')
+instrument.sidebar_panel()
+jobs.sidebar_panel()
 
 uploaded = st.file_uploader('Upload your monthly Excel workbook (.xlsx)', type=['xlsx'])
 minp = st.number_input('Min periods for expanding z-score (when Inputs used)', min_value=6, max_value=120, value=24)
+ragged = st.checkbox('Keep months with missing series (ragged panel, pairwise PCA)', value=False,
+                     help='Late-starting series no longer cut every factor to their start date.')
 
-@st.cache_data(show_spinner=False)
-def _cache_parse(xls_bytes: bytes, minp_z:int):
-    xf = data_ingest.read_excel_bytes(xls_bytes)
-    sheets = data_ingest.detect_sheets(xf)
-    Z = data_ingest.load_variables(xf, prefer_raw=True, minp_z=minp_z)
-    try:
-        returns = data_ingest.load_returns(xf)
-    except Exception:
-        returns = None
+def _cache_parse(xls_bytes: bytes, minp_z:int, ragged: bool = False):
+    # Persistent layer: survives restarts and is shared by workers on the same disk
+    key = disk_cache.entry_key('parse', bytes_hash(xls_bytes), minp_z, *(['ragged'] if ragged else []))
+    hit = disk_cache.load(key)
+    if hit is not None:
+        return hit['sheets'], hit['Z'], hit['returns']
+    # Single open, single pass per sheet; python-calamine is used when installed
+    sheets, Z, returns = data_ingest.parse_workbook(xls_bytes, prefer_raw=True, minp_z=minp_z, ragged=ragged)
+    disk_cache.store(key, {'sheets': sheets, 'Z': Z, 'returns': returns})
     return sheets, Z, returns
 
 if uploaded is not None:
     key = file_hash(uploaded)
-    sheets, Z, returns = _cache_parse(uploaded.getvalue(), minp)
+    # One parse per workbook for the whole server: sessions uploading the same file
+    # wait for the parse already running and share its frames
+    sheets, Z, returns = registry.shared(('parse', key, int(minp), bool(ragged)),
+                                         lambda: _cache_parse(uploaded.getvalue(), int(minp), bool(ragged)), slot='parse')
     st.subheader('Detected sheets'); st.json(sheets)
     st.subheader('Z-scores (preview)'); st.dataframe(Z.tail(10))
     if returns is not None:
         st.subheader('Returns (preview)'); st.dataframe(returns.tail(10))
     st.session_state['xls_hash'] = key
+    st.session_state['minp_z'] = int(minp)
+    st.session_state['ragged'] = bool(ragged)
     st.session_state['Z'] = Z
     st.session_state['returns'] = returns
     st.success('Workbook parsed and cached. Navigate to the next pages.')
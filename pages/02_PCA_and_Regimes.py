@@ -4,20 +4,21 @@ import matplotlib.pyplot as plt
 
 from src import pca as pca_mod
 from src import regimes as regimes_mod
+from src import pipeline
+from src import instrument
+from src import jobs
+from src import registry
+from src import cache as disk_cache
+from src.analytics import fingerprint
 
 st.title('PCA & Regimes')
+instrument.sidebar_panel()
 
 # Expect Z (z-scores) in session_state from the Upload page
 Z = st.session_state.get('Z')
 if Z is None:
     st.warning('Please upload data on the Upload page.'); st.stop()
 
-# Run PCA (your existing expanding PCA)
-PC, EVR, loadings = pca_mod.expanding_pca_2(Z)
-
-# Compute regimes using your existing logic
-regime_raw = regimes_mod.compute_regime(PC)
-
 # --- Make a clean datetime-indexed Series of regime labels ---
 def _as_regime_series(obj) -> pd.Series:
     # If already a Series, ensure datetime index
@@ -47,100 +48,65 @@ def _as_regime_series(obj) -> pd.Series:
         s.index = pd.to_datetime(s.index, errors='coerce')
     return s.dropna()
 
-regime = _as_regime_series(regime_raw)
-
-# --- Safe regime shading: no `.loc` on DatetimeIndex ---
-REGIME_COLORS = {
-    "ON": "tab:green",
-    "OFF": "tab:red",
-    "IG/HY": "tab:purple",
-    # fallback color if label unknown
-}
-
-import pandas as pd
-
-# You likely already have a palette; keep yours if present.
-REGIME_COLORS = {
-    "Goldilocks": "tab:green",
-    "Reflation" : "tab:orange",
-    "Stagflation": "tab:red",
-    "Deflation" : "tab:purple",
-    "ON"        : "tab:green",
-    "OFF"       : "tab:red",
-}
-
-def shade_regime_bands(ax, regime, alpha: float = 0.15):
-    """
-    Shade contiguous regime segments on the given axes.
-
-    Parameters
-    ----------
-    ax : matplotlib Axes
-    regime : pandas Series or DataFrame
-        - If Series: labels indexed by datetime.
-        - If DataFrame: must contain ['Date','Regime'] or a single column.
-    alpha : float
-        Fill alpha.
-
-    Notes
-    -----
-    This version **does not use `.loc` on a DatetimeIndex** and is compatible
-    with callers that pass an index of timestamps (fixes AttributeError).
-    """
-    # Coerce to a label Series on a DatetimeIndex
-    if isinstance(regime, pd.DataFrame):
-        df = regime.copy()
-        df.columns = [str(c).strip() for c in df.columns]
-        if 'Date' in df.columns and 'Regime' in df.columns:
-            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-            df = df.dropna(subset=['Date']).set_index('Date')
-            reg = df['Regime']
-        else:
-            reg = df.squeeze()
-    else:
-        reg = regime
-
-    if not isinstance(reg.index, pd.DatetimeIndex):
-        reg.index = pd.to_datetime(reg.index, errors='coerce')
-    reg = reg.dropna()
-
-    # Group consecutive equal labels
-    blocks = (reg != reg.shift()).cumsum()
-    for _, idx in reg.groupby(blocks).groups.items():
-        idx = list(idx)  # list of Timestamps
-        if not idx:
-            continue
-        label = reg.loc[idx[0]]
-        start_ts, end_ts = idx[0], idx[-1]
-        ax.axvspan(start_ts, end_ts,
-                   color=REGIME_COLORS.get(label, "lightgrey"),
-                   alpha=alpha, lw=0)
-# Persist to session (as before)
-st.session_state['PC'] = PC
-st.session_state['EVR'] = EVR
-st.session_state['regime'] = regime
-st.session_state['loadings_latest'] = loadings
+# Run PCA once (expanding, or a rolling lookback); the Contributors page reads the same timeline.
+# Results persist on disk keyed by workbook hash, minp_z and the PCA config;
+# a workbook that only adds months to a cached one fits just the new months.
+# A ragged panel (Upload page option) uses pairwise moments, which are expanding-only.
+ragged = st.session_state.get('ragged', False)
+window = None if ragged else st.radio('PCA window', [None, 60, 120], horizontal=True, key='pca_window',
+                                      format_func=lambda w: 'Expanding' if w is None else f'Rolling {w}m')
+cfg = {**pca_mod.DEFAULT_CONFIG, 'window': window, 'missing': 'pairwise' if ragged else 'drop'}
+xls_hash, minp_z = st.session_state.get('xls_hash'), st.session_state.get('minp_z')
+run_key = ('pca', xls_hash or fingerprint(Z), minp_z, disk_cache.config_hash(cfg))
+
+def _run_pca(Z, xls_hash, minp_z, cfg, run_key, owner, progress=None):
+    # Background job: returns the session-state entries every page reads. The registry
+    # runs one fit per key for all sessions and shares its (read-only) arrays.
+    pca_tl, PC, EVR, loadings, regime_raw, how = registry.shared(
+        run_key, lambda: pipeline.pca_and_regime(Z, xls_hash, minp_z, cfg, progress=progress), slot='pca', owner=owner)
+    return {'PC': PC, 'EVR': EVR, 'regime': _as_regime_series(regime_raw), 'loadings_latest': loadings,
+            'pca_tl': pca_tl, 'pca_how': how, 'pca_key': run_key}
+
+# The fit runs on the job pool: progress / Cancel in the sidebar, results published
+# to session state (for every page) when done. Quick fits and cache hits render in this run.
+jobs.collect()
+if st.session_state.get('pca_key') != run_key:
+    ended = jobs.stopped(run_key)
+    if ended and not st.button('Run PCA again'):
+        jobs.sidebar_panel(); st.warning(f'PCA {ended}.'); st.stop()
+    jobs.resume(run_key)
+    job = jobs.submit(run_key, _run_pca, Z, xls_hash, minp_z, cfg, run_key, registry.session_id(), label='PCA', unit='month')
+    jobs.track(job); job.wait(timeout=2.0)
+jobs.sidebar_panel()
+if st.session_state.get('pca_key') != run_key:
+    st.info('PCA is running in the background; progress is in the sidebar. '
+            'Results appear here and on the other pages when it finishes.'); st.stop()
+
+registry.hold(run_key, slot='pca')     # a fit joined from another session's job is held by this session too
+PC, EVR, loadings, regime, pca_tl = (st.session_state[k] for k in ['PC', 'EVR', 'loadings_latest', 'regime', 'pca_tl'])
+if st.session_state.get('pca_how') == 'append':
+    st.caption('Incremental update: new months appended to the cached PCA history.')
 
 # --- Plot ---
 fig, axes = plt.subplots(3, 1, figsize=(14, 10), sharex=True,
                          gridspec_kw={'height_ratios':[2,2,1], 'hspace':0.1})
 
 # PC1
-shade_regime_bands(axes[0], regime)
+regimes_mod.shade_regime_bands(axes[0], regime)
 axes[0].plot(PC.index, PC['PC1'], label='PC1', color='tab:blue')
 if 'PC1_SMA5' in PC.columns:
     axes[0].plot(PC.index, PC['PC1_SMA5'], label='SMA(5)', color='k', ls='--')
 axes[0].legend(); axes[0].set_title('PC1 & SMA(5)')
 
 # PC2
-shade_regime_bands(axes[1], regime)
+regimes_mod.shade_regime_bands(axes[1], regime)
 axes[1].plot(PC.index, PC['PC2'], label='PC2', color='tab:orange')
 if 'PC2_SMA5' in PC.columns:
     axes[1].plot(PC.index, PC['PC2_SMA5'], label='SMA(5)', color='k', ls='--')
 axes[1].legend(); axes[1].set_title('PC2 & SMA(5)')
 
 # ΔPC2 bars
-shade_regime_bands(axes[2], regime)
+regimes_mod.shade_regime_bands(axes[2], regime)
 if 'dPC2' in PC.columns:
     axes[2].bar(
         PC.index,
@@ -1,20 +1,21 @@
 import streamlit as st
 import matplotlib.pyplot as plt
 from matplotlib.ticker import FuncFormatter
-from src.metrics import rolling_excess, cumulative_excess
-from src.backtest import hy_ig_strategy
+from src.analytics import get_analytics
+from src import instrument
+from src import jobs
 
 st.title('Performance & Alpha')
+instrument.sidebar_panel()
+jobs.sidebar_panel()
 
 returns = st.session_state.get('returns'); regime = st.session_state.get('regime')
 if returns is None or regime is None:
     st.warning('Please upload data and run PCA first.'); st.stop()
 
-res = hy_ig_strategy(returns, regime)
-strat = res['strat_ret']; bench = res['bench_ret']
-
-roll = rolling_excess(strat, bench, window=12)
-cumx = cumulative_excess(strat, bench)
+res = get_analytics(returns, regime)
+roll = res.rolling_excess(window=12)
+cumx = res.cumulative_excess
 
 fig, ax = plt.subplots(figsize=(14,5.5))
 ax.plot(roll.index, roll, color='tab:green', lw=2.0, label='12m Rolling Excess (geometric)')
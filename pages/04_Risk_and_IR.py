@@ -1,22 +1,24 @@
 import streamlit as st
 import matplotlib.pyplot as plt
 from matplotlib.ticker import FuncFormatter
-from src.metrics import calendar_returns, rolling_te_ir
-from src.backtest import hy_ig_strategy
+from src.analytics import get_analytics
+from src import instrument
+from src import jobs
 
 st.title('Risk & IR')
+instrument.sidebar_panel()
+jobs.sidebar_panel()
 
 returns = st.session_state.get('returns'); regime = st.session_state.get('regime')
 if returns is None or regime is None:
     st.warning('Please upload data and run PCA first.'); st.stop()
 
-res = hy_ig_strategy(returns, regime)
-strat = res['strat_ret']; bench = res['bench_ret']
+res = get_analytics(returns, regime)
 
-cal = calendar_returns(strat, bench)
+cal = res.calendar
 st.subheader('Calendar-year compounded returns'); st.dataframe((cal*100).round(2))
 
-te_roll, te_over, ir_roll, ir_over, ann_s, ann_b = rolling_te_ir(strat, bench, window=12)
+te_roll, te_over, ir_roll, ir_over, ann_s, ann_b = res.te_ir(window=12)
 
 fig, axes = plt.subplots(2,1, figsize=(14,8), sharex=True, gridspec_kw={'height_ratios':[2,1],'hspace':0.1})
 axes[0].plot(te_roll.index, te_roll, color='tab:red', lw=2, label='Rolling TE (12m, annualised)')
@@ -28,3 +30,20 @@ axes[1].axhline(0, color='k', lw=1); axes[1].set_title('Information Ratio — Ro
 st.pyplot(fig)
 
 st.info(f"Overall TE: {te_over:.2%} | Strategy ann. return: {ann_s:.2%} | EMBI GD ann. return: {ann_b:.2%} | IR: {ir_over:.2f}")
+
+with st.expander('Is the IR significant? (block bootstrap)'):
+    c1, c2 = st.columns(2)
+    n_boot = c1.select_slider('Resamples', options=[2_000, 10_000, 50_000], value=10_000)
+    block = c2.slider('Mean block length (months)', 1, 24, 6)
+    if st.button('Run bootstrap'):
+        with st.spinner('Resampling...'):
+            bs = res.bootstrap(n_boot=n_boot, block=block)
+        st.dataframe(bs['ci'].style.format('{:.3f}'))
+        p = bs['p_value']
+        st.info(f"One-sided p-values (H0: no outperformance) — IR: {p['ir']:.3f} | "
+                f"Excess return: {p['ann_excess']:.3f} | Shallower drawdown than EMBI GD: {p['max_dd_diff']:.3f}")
+        fig, ax = plt.subplots(figsize=(14,4))
+        ax.hist(bs['samples']['ir'].dropna(), bins=80, color='tab:purple', alpha=0.7)
+        ax.axvline(bs['observed']['ir'], color='k', lw=2, label=f"Observed IR = {bs['observed']['ir']:.2f}"); ax.axvline(0, color='k', lw=1, ls='--')
+        ax.set_title(f'Bootstrap distribution of IR ({n_boot:,} stationary-bootstrap resamples, mean block {block}m)'); ax.legend()
+        st.pyplot(fig)
@@ -2,8 +2,12 @@ import streamlit as st
 import matplotlib.pyplot as plt
 from src.plots import plot_pc_with_sma
 from src import regimes as regimes_mod
+from src import instrument
+from src import jobs
 
 st.title('PC Time Series')
+instrument.sidebar_panel()
+jobs.sidebar_panel()
 
 PC = st.session_state.get('PC'); regime = st.session_state.get('regime')
 if PC is None or regime is None:
@@ -1,24 +1,31 @@
 import streamlit as st
-import io
-from matplotlib.backends.backend_pdf import PdfPages
-import matplotlib.pyplot as plt
-from src.backtest import hy_ig_strategy
-from src import regimes as regimes_mod
+from src.analytics import fingerprint
+from src import report
+from src import instrument
+from src import jobs
 
 st.title('Report (PDF)')
+instrument.sidebar_panel()
 
 returns = st.session_state.get('returns'); regime = st.session_state.get('regime'); PC = st.session_state.get('PC')
 if returns is None or regime is None or PC is None:
     st.warning('Please upload data and run PCA first.'); st.stop()
 
-res = hy_ig_strategy(returns, regime)
+Z = st.session_state.get('Z'); pca_tl = st.session_state.get('pca_tl'); loadings = st.session_state.get('loadings_latest')
+st.caption('PC time series, latest loadings, current contributors, cumulative / rolling excess, TE & IR, '
+           'calendar-year table and drawdowns. Charts are rendered in parallel and reused until the inputs change.')
 
-buf = io.BytesIO()
-with PdfPages(buf) as pdf:
-    fig, ax = plt.subplots(figsize=(14,6))
-    regimes_mod.shade_regime_bands(ax, regime, alpha=0.28)
-    ax.plot(res['cum_strat'].index, res['cum_strat'], label='PCA Switch (HY/IG)', color='k', lw=2.3)
-    ax.plot(res['cum_bench'].index, res['cum_bench'], label='EMBI GD', color='tab:blue', lw=2)
-    ax.set_title('Cumulative Total Return (Start=1)'); ax.set_ylabel('Growth of $1'); ax.legend(); pdf.savefig(fig); plt.close(fig)
+def _build(key, *inputs, progress=None):
+    return {'report_pdf': (key, report.build_report(*inputs, progress=progress))}
 
-st.download_button('Download Report.pdf', data=buf.getvalue(), file_name='PCA_Regime_Report.pdf', mime='application/pdf')
+# Built only on request, as a background job (progress / Cancel in the sidebar);
+# the PDF is kept for this session until the inputs change
+key = fingerprint(returns, regime, PC)
+if st.button('Build report', type='primary'):
+    job = jobs.submit(('report', key), _build, key, returns, regime, PC, Z, pca_tl, loadings, label='Report', unit='chart')
+    jobs.track(job); job.wait(timeout=2.0)
+jobs.sidebar_panel()
+
+built = st.session_state.get('report_pdf')
+if built is not None and built[0] == key:
+    st.download_button('Download Report.pdf', data=built[1], file_name='PCA_Regime_Report.pdf', mime='application/pdf')
@@ -1,18 +1,27 @@
+import importlib.util
 import streamlit as st
-from src.exporters import export_labels_basic, export_labels_strategy
+from src.exporters import export_labels_basic, export_labels_strategy, FORMATS
+from src import instrument
+from src import jobs
 
 st.title('Export (Excel/CSV)')
+instrument.sidebar_panel()
+jobs.sidebar_panel()
 
 returns = st.session_state.get('returns'); regime = st.session_state.get('regime')
 if returns is None or regime is None:
     st.warning('Please upload data and run PCA first.'); st.stop()
 
+# Files are generated only when a download button is clicked (CSV / Parquet hold the main table only)
+fmts = [f for f in FORMATS if f != 'parquet' or importlib.util.find_spec('pyarrow') is not None]
+fmt = st.radio('Format', fmts, horizontal=True, format_func={'xlsx': 'Excel', 'csv': 'CSV', 'parquet': 'Parquet'}.get)
+
 col1, col2 = st.columns(2)
 with col1:
     st.subheader('Basic labels (Date, Regime, Risk_On)')
-    b = export_labels_basic(returns, regime)
-    st.download_button('Download Regime_RiskOn_Labels.xlsx', data=b, file_name='Regime_RiskOn_Labels.xlsx', mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    st.download_button(f'Download Regime_RiskOn_Labels.{fmt}', data=lambda: export_labels_basic(returns, regime, fmt),
+                       file_name=f'Regime_RiskOn_Labels.{fmt}', mime=FORMATS[fmt])
 with col2:
     st.subheader('Labels + Sleeve + Strategy return (no look-ahead)')
-    b = export_labels_strategy(returns, regime)
-    st.download_button('Download Regime_RiskOn_Sleeve_Strategy.xlsx', data=b, file_name='Regime_RiskOn_Sleeve_Strategy.xlsx', mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    st.download_button(f'Download Regime_RiskOn_Sleeve_Strategy.{fmt}', data=lambda: export_labels_strategy(returns, regime, fmt),
+                       file_name=f'Regime_RiskOn_Sleeve_Strategy.{fmt}', mime=FORMATS[fmt])
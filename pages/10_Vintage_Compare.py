@@ -0,0 +1,47 @@
+import os
+import streamlit as st
+import matplotlib.pyplot as plt
+from src.utils import bytes_hash
+from src import vintages
+from src import cache as disk_cache
+from src import instrument
+from src import jobs
+
+st.title('Vintage Comparison')
+instrument.sidebar_panel()
+jobs.sidebar_panel()
+
+uploaded = st.file_uploader('Upload workbook vintages (.xlsx, oldest first)', type=['xlsx'], accept_multiple_files=True)
+minp = st.session_state.get('minp_z', 24)
+if not uploaded or len(uploaded) < 2:
+    st.info('Upload at least two vintages of the workbook to compare them.'); st.stop()
+
+# One memory-mapped panel per set of vintages; PCA workers share it instead of receiving copies
+data = [f.getvalue() for f in uploaded]
+root = os.path.join(disk_cache.CACHE_DIR, disk_cache.entry_key('vintages', bytes_hash('|'.join([bytes_hash(b) for b in data] + [str(minp)]).encode())))
+n_jobs = os.cpu_count() or 1
+try:
+    store = vintages.VintageStore(root)
+except (OSError, ValueError):
+    disk_cache.evict()      # make room first: the store is a cache entry, and evicting after the build could drop it before run_pca
+    with st.spinner('Building vintage store…'):
+        store = vintages.build_vintage_store(data, root, names=[f.name for f in uploaded], minp_z=minp, n_jobs=n_jobs)
+if not store.meta.get('pca_done'):
+    with st.spinner('Running expanding PCA per vintage…'): store.run_pca(n_jobs=n_jobs)
+
+base = st.selectbox('Compare against', store.vintages, index=len(store) - 1)
+cmp = store.compare(base)
+st.subheader(f'Revisions vs {base}')
+st.dataframe(cmp['summary'].style.format({'flip_share': '{:.1%}'}, precision=3))
+
+fig, axes = plt.subplots(2, 1, figsize=(14, 7), sharex=True)
+for ax, key, title in [(axes[0], 'pc1_drift', 'PC1 drift vs base'), (axes[1], 'pc2_drift', 'PC2 drift vs base')]:
+    for v in store.vintages:
+        if v != base: ax.plot(cmp[key].index, cmp[key][v], lw=1.5, label=v)
+    ax.axhline(0, color='k', lw=1); ax.set_title(title)
+axes[0].legend(loc='best')
+st.pyplot(fig)
+
+changed = cmp['changed'].any(axis=1)
+st.subheader(f'Dates where a vintage labels the regime differently ({int(changed.sum())})')
+st.dataframe(cmp['regime'][changed])
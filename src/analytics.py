@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+from functools import cached_property
+import pandas as pd
+from .utils import bytes_hash
+from .backtest import hy_ig_strategy
+from . import metrics
+from .bootstrap import bootstrap_strategy
+
+MAX_ENTRIES = 16
+_memo = OrderedDict(); _lock = threading.Lock()
+
+def fingerprint(*objs) -> str:
+    """Content hash of pandas objects (values + index), used as the memo key."""
+    h = b''.join(pd.util.hash_pandas_object(o, index=True).values.tobytes() + str(getattr(o, 'columns', '')).encode() for o in objs)
+    return bytes_hash(h)
+
+class StrategyAnalytics:
+    """
+    HY/IG switch analytics for one (returns, regime) pair. Every field is
+    computed lazily on first access and then reused; windowed metrics are
+    memoized per window. Results are shared read-only between pages/sessions.
+    """
+    def __init__(self, returns: pd.DataFrame, regime: pd.Series, key: str = None):
+        self.returns, self.regime = returns, regime
+        self.key = key or fingerprint(returns, regime)
+        self._windowed = {}
+
+    @cached_property
+    def strategy(self) -> dict: return hy_ig_strategy(self.returns, self.regime)
+    @property
+    def strat_ret(self): return self.strategy['strat_ret']
+    @property
+    def bench_ret(self): return self.strategy['bench_ret']
+    @property
+    def w_hy(self): return self.strategy['w_hy']
+    @property
+    def cum_strat(self): return self.strategy['cum_strat']
+    @property
+    def cum_bench(self): return self.strategy['cum_bench']
+    @property
+    def dd_strat(self): return self.strategy['dd_strat']
+    @property
+    def dd_bench(self): return self.strategy['dd_bench']
+
+    @cached_property
+    def cumulative_excess(self): return metrics.cumulative_excess(self.strat_ret, self.bench_ret)
+    @cached_property
+    def calendar(self): return metrics.calendar_returns(self.strat_ret, self.bench_ret)
+
+    def _memo(self, name, window, fn):
+        k = (name, window)
+        if k not in self._windowed: self._windowed[k] = fn(self.strat_ret, self.bench_ret, window=window)
+        return self._windowed[k]
+
+    def rolling_excess(self, window: int = 12): return self._memo('rolling_excess', window, metrics.rolling_excess)
+    def te_ir(self, window: int = 12):
+        """(te_roll, te_over, ir_roll, ir_over, ann_s, ann_b) as returned by metrics.rolling_te_ir."""
+        return self._memo('te_ir', window, metrics.rolling_te_ir)
+    def bootstrap(self, n_boot: int = 10_000, block: float = 6, method: str = 'stationary', seed: int = 0):
+        """Block-bootstrap IR / excess / drawdown distributions and p-values (see bootstrap.bootstrap_strategy)."""
+        k = ('bootstrap', n_boot, block, method, seed)
+        if k not in self._windowed: self._windowed[k] = bootstrap_strategy(self.strategy, n_boot, block, method, seed)
+        return self._windowed[k]
+
+def get_analytics(returns: pd.DataFrame, regime: pd.Series) -> StrategyAnalytics:
+    """Process-wide memoized StrategyAnalytics keyed on the (returns, regime) fingerprint (LRU, MAX_ENTRIES)."""
+    key = fingerprint(returns, regime)
+    with _lock:
+        a = _memo.get(key)
+        if a is None:
+            a = _memo[key] = StrategyAnalytics(returns, regime, key)
+        _memo.move_to_end(key)
+        while len(_memo) > MAX_ENTRIES: _memo.popitem(last=False)
+    return a
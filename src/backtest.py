@@ -1,12 +1,91 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np, pandas as pd
+from .regimes import regime_codes, regime_codes_from_sma, RISK_ON_CODES, REGIMES
+from .instrument import traced
 
+@traced
 def drawdown(r: pd.Series) -> pd.Series:
     c=(1+r).cumprod(); return c/c.cummax()-1
 
+@traced
 def hy_ig_strategy(returns: pd.DataFrame, regime: pd.Series):
     idx = returns.index.intersection(regime.index)
-    ret = returns.loc[idx]; reg = regime.loc[idx]
-    sig = reg.shift(1)
-    wHY = sig.isin(['Goldilocks','Reflation']).astype(float); wIG = 1.0-wHY
+    ret = returns.loc[idx]; codes = regime_codes(regime.loc[idx])
+    sig = np.r_[np.int8(-1), codes[:-1]] if len(codes) else codes
+    wHY = pd.Series(np.isin(sig, RISK_ON_CODES).astype(float), index=idx); wIG = 1.0-wHY
     strat = wHY*ret['HY'] + wIG*ret['IG']; bench = ret['EMBI']
-    return {'strat_ret': strat,'bench_ret': bench,'cum_strat': (1+strat).cumprod(),'cum_bench': (1+bench).cumprod(),'dd_strat': drawdown(strat),'dd_bench': drawdown(bench)}
+    return {'strat_ret': strat,'bench_ret': bench,'w_hy': wHY,'cum_strat': (1+strat).cumprod(),'cum_bench': (1+bench).cumprod(),'dd_strat': drawdown(strat),'dd_bench': drawdown(bench)}
+
+# ---------------------------
+# Parameter sweeps
+# ---------------------------
+DEFAULT_MAPPINGS = {'Goldilocks+Reflation': ('Goldilocks', 'Reflation')}
+
+def _sweep_chunk(hy, ig, bench, pcs, configs, mappings):
+    """
+    Evaluate configs [(sma, lag, mapping, cost), ...] as one (dates x configs) computation.
+    As with hy_ig_strategy(returns, compute_regime(PC).dropna()), each config's
+    sample is the dates where its regime is defined (undefined months, leading
+    or mid-sample, are dropped) and the signal lags by `lag` of those dates.
+    """
+    T, C = len(hy), len(configs)
+    wins = sorted({c[0] for c in configs})
+    sma = {w: pd.DataFrame(pcs).rolling(w, min_periods=w).mean().to_numpy() for w in wins}
+    codes = np.stack([regime_codes_from_sma(sma[c[0]][:, 0], sma[c[0]][:, 1]) for c in configs], axis=1)   # (T, C)
+    # Compact each config onto its defined dates: row k of column c is its k-th defined date
+    defined = codes >= 0; n_def = defined.sum(axis=0)
+    rows = np.argsort(~defined, axis=0, kind='stable'); cols = np.arange(C)[None, :]
+    codes = codes[rows, cols]; hy, ig, bench = hy[rows], ig[rows], bench[rows]
+    lag = np.array([c[1] for c in configs]); cost = np.array([c[3] for c in configs], dtype=float)
+    # HY membership per mapping, looked up by code+1 so -1 (no signal yet) -> column 0 -> IG
+    names = list(mappings); table = np.zeros((len(names), len(REGIMES)+1), bool)
+    for m, n in enumerate(names): table[m, 1 + np.array([REGIMES.index(r) for r in mappings[n]], dtype=int)] = True
+    mi = np.array([names.index(c[2]) for c in configs])
+
+    k = np.arange(T)[:, None]; src = k - lag[None, :]
+    sig = np.where(src >= 0, codes[np.clip(src, 0, T-1), cols], -1)
+    w = table[mi[None, :], sig + 1].astype(float)
+    turn = np.abs(np.diff(w, axis=0, prepend=w[:1]))
+    strat = w*hy + (1.0-w)*ig - cost[None, :]*turn
+    insample = (k < n_def[None, :]) & ~np.isnan(strat) & ~np.isnan(bench)
+    s = np.where(insample, strat, np.nan); b = np.where(insample, bench, np.nan); act = s - b
+    with np.errstate(invalid='ignore', divide='ignore'):
+        n = insample.sum(axis=0)
+        ann_s = np.nanmean(s, axis=0)*12; ann_b = np.nanmean(b, axis=0)*12
+        te = np.nanstd(act, axis=0, ddof=1)*np.sqrt(12)
+        growth = np.cumprod(np.where(insample, 1+strat, 1.0), axis=0)
+        max_dd = (growth/np.maximum.accumulate(growth, axis=0) - 1).min(axis=0)
+        ir = np.where(te > 0, (ann_s-ann_b)/te, np.nan)
+    return pd.DataFrame({'sma': [c[0] for c in configs], 'lag': lag, 'mapping': [c[2] for c in configs], 'cost': cost,
+                         'n_months': n, 'ann_strat': ann_s, 'ann_bench': ann_b, 'ann_excess': ann_s-ann_b,
+                         'te': te, 'ir': ir, 'max_dd': max_dd, 'switches': (turn*insample).sum(axis=0)})
+
+@traced
+def hy_ig_sweep(returns: pd.DataFrame, PC: pd.DataFrame, sma_windows=(5,), lags=(1,), mappings=None,
+                costs=(0.0,), n_jobs: int = 1, chunk: int = 512) -> pd.DataFrame:
+    """
+    Grid backtest of the HY/IG switch over SMA windows x signal lags x
+    regime->HY mappings x transaction costs (return cost per full switch).
+    PC needs raw 'PC1'/'PC2' scores; regimes are rebuilt per SMA window.
+    Returns one row per configuration with annualised strategy/benchmark
+    return, excess, TE, IR, max drawdown and number of switches. With
+    n_jobs > 1 the grid is split into chunks evaluated in a process pool.
+    The default config (5, 1, Goldilocks+Reflation, 0) reproduces
+    hy_ig_strategy on the dates where the regime is defined; lags must be >= 1.
+    """
+    lags = list(lags)
+    if any(int(l) != l or l < 1 for l in lags):
+        raise ValueError(f'lags must be whole months >= 1 (lag 0 would trade on the same month\'s regime), got {list(lags)}.')
+    mappings = dict(DEFAULT_MAPPINGS if mappings is None else mappings)
+    idx = returns.index.intersection(PC.index)
+    ret = returns.loc[idx, ['HY','IG','EMBI']].to_numpy(dtype=float); pcs = PC.loc[idx, ['PC1','PC2']].to_numpy(dtype=float)
+    configs = list(itertools.product(sma_windows, map(int, lags), mappings, costs))
+    parts = [configs[i:i+chunk] for i in range(0, len(configs), chunk)]
+    args = (ret[:, 0], ret[:, 1], ret[:, 2], pcs)
+    if n_jobs > 1 and len(parts) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as ex:
+            out = list(ex.map(_sweep_chunk, *zip(*[args + (p, mappings) for p in parts])))
+    else:
+        out = [_sweep_chunk(*args, p, mappings) for p in parts]
+    return pd.concat(out, ignore_index=True) if out else pd.DataFrame()
@@ -0,0 +1,136 @@
+# cache.py
+import json, os, shutil, time, uuid
+import numpy as np, pandas as pd
+from .utils import bytes_hash
+
+# ---------------------------
+# Location & limits
+# ---------------------------
+CACHE_DIR = os.environ.get('PCA_APP_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'pca_regime_app'))
+MAX_BYTES = int(float(os.environ.get('PCA_APP_CACHE_MAX_MB', '1024')) * (1 << 20))
+
+def config_hash(cfg: dict) -> str:
+    """Stable short hash of a JSON-able config dict (e.g. PCA settings)."""
+    return bytes_hash(json.dumps(cfg, sort_keys=True, default=str).encode('utf-8'))
+
+def entry_key(kind: str, *parts) -> str:
+    """Directory name for an entry, e.g. entry_key('pca', file_hash, minp_z, config_hash(cfg))."""
+    return '-'.join([kind] + [str(p) for p in parts])
+
+# ---------------------------
+# Columnar (de)serialisation
+# ---------------------------
+def _index_to_array(idx: pd.Index) -> np.ndarray:
+    if isinstance(idx, pd.DatetimeIndex): return idx.tz_localize(None).values
+    return np.asarray(idx.astype(str), dtype=str)
+
+def _array_to_index(a: np.ndarray, name=None) -> pd.Index:
+    if a.dtype.kind == 'M': return pd.DatetimeIndex(a, name=name)
+    return pd.Index(a.tolist(), name=name)
+
+def _write(path: str, name: str, obj, meta: dict):
+    """Write one payload value as .npy file(s) under `path`, recording how to rebuild it in `meta`."""
+    f = lambda suffix: os.path.join(path, f'{name}.{suffix}.npy')
+    if obj is None or isinstance(obj, (str, int, float, bool, list)):
+        meta[name] = {'kind': 'json', 'value': obj}
+    elif isinstance(obj, dict) and all(isinstance(v, (str, type(None))) for v in obj.values()):
+        meta[name] = {'kind': 'json', 'value': obj}
+    elif isinstance(obj, dict):
+        sub = {}
+        for k, v in obj.items(): _write(path, f'{name}.{k}', v, sub)
+        meta[name] = {'kind': 'dict', 'items': sub}
+    elif isinstance(obj, np.ndarray):
+        np.save(f('values'), obj, allow_pickle=False); meta[name] = {'kind': 'array'}
+    elif isinstance(obj, pd.Index):
+        np.save(f('values'), _index_to_array(obj), allow_pickle=False); meta[name] = {'kind': 'index', 'name': obj.name}
+    elif isinstance(obj, (pd.Series, pd.DataFrame)):
+        df = obj.to_frame() if isinstance(obj, pd.Series) else obj
+        labels = not all(pd.api.types.is_numeric_dtype(t) or pd.api.types.is_bool_dtype(t) for t in df.dtypes)
+        vals = (df.astype(object).where(df.notna(), '').astype(str).to_numpy(dtype=str) if labels
+                else df.to_numpy(dtype=float))
+        np.save(f('values'), vals, allow_pickle=False)
+        np.save(f('index'), _index_to_array(df.index), allow_pickle=False)
+        meta[name] = {'kind': 'series' if isinstance(obj, pd.Series) else 'frame', 'labels': labels,
+                      'columns': [str(c) for c in df.columns], 'index_name': df.index.name,
+                      'dtypes': [str(t) for t in df.dtypes],
+                      'name': obj.name if isinstance(obj, pd.Series) else None,
+                      'categories': list(obj.cat.categories) if isinstance(obj, pd.Series) and isinstance(obj.dtype, pd.CategoricalDtype) else None}
+    else:
+        raise TypeError(f'Cannot cache {name!r} of type {type(obj).__name__}.')
+
+def _read(path: str, name: str, m: dict):
+    f = lambda suffix: os.path.join(path, f'{name}.{suffix}.npy')
+    kind = m['kind']
+    if kind == 'json': return m['value']
+    if kind == 'dict': return {k[len(name)+1:]: _read(path, k, v) for k, v in m['items'].items()}
+    if kind == 'array': return np.load(f('values'), mmap_mode='r', allow_pickle=False)
+    if kind == 'index': return _array_to_index(np.load(f('values'), allow_pickle=False), m['name'])
+    vals = np.load(f('values'), mmap_mode=None if m['labels'] else 'r', allow_pickle=False)
+    idx = _array_to_index(np.load(f('index'), allow_pickle=False), m['index_name'])
+    if m['labels']: vals = np.where(vals == '', np.nan, vals.astype(object))
+    df = pd.DataFrame(vals, index=idx, columns=m['columns'])
+    df = df.astype({c: (object if t == 'object' else t) for c, t in zip(m['columns'], m['dtypes'])
+                    if not m['labels'] or t == 'object'})
+    if kind == 'frame': return df
+    s = df.iloc[:, 0].rename(m['name'])
+    return s.astype(pd.CategoricalDtype(m['categories'])) if m.get('categories') is not None else s
+
+# ---------------------------
+# Public API
+# ---------------------------
+def load(key: str, root: str = None):
+    """
+    Return the cached payload dict for `key`, or None on a miss / unreadable entry.
+    Numeric arrays come back memory-mapped read-only. A hit refreshes the
+    entry's LRU timestamp.
+    """
+    path = os.path.join(root or CACHE_DIR, key); mpath = os.path.join(path, 'meta.json')
+    try:
+        with open(mpath, 'r', encoding='utf-8') as fh: meta = json.load(fh)
+        out = {name: _read(path, name, m) for name, m in meta.items()}
+    except (OSError, ValueError, KeyError):
+        return None
+    try: os.utime(mpath, None)
+    except OSError: pass
+    return out
+
+def store(key: str, payload: dict, root: str = None) -> None:
+    """
+    Persist `payload` (DataFrames, Series, ndarrays, Index, nested dicts of those,
+    or JSON scalars) under `key`. Written to a temp dir and renamed into place,
+    so concurrent workers never see a half-written entry. Evicts LRU entries
+    beyond MAX_BYTES afterwards.
+    """
+    root = root or CACHE_DIR; os.makedirs(root, exist_ok=True)
+    tmp = os.path.join(root, f'.tmp-{uuid.uuid4().hex}'); os.makedirs(tmp)
+    try:
+        meta = {}
+        for name, obj in payload.items(): _write(tmp, name, obj, meta)
+        with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as fh: json.dump(meta, fh)
+        final = os.path.join(root, key)
+        if os.path.isdir(final): shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True); return
+    evict(root=root)
+
+def evict(max_bytes: int = None, root: str = None) -> int:
+    """Drop least-recently-used entries until the cache fits in `max_bytes`. Returns bytes freed."""
+    root = root or CACHE_DIR; max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    for name in os.listdir(root) if os.path.isdir(root) else []:
+        path = os.path.join(root, name)
+        try:
+            if name.startswith('.tmp-'):
+                # stale temp dirs from crashed writers (live ones may vanish under us: renamed into place)
+                if time.time() - os.path.getmtime(path) > 3600: shutil.rmtree(path, ignore_errors=True)
+                continue
+            size = sum(e.stat().st_size for e in os.scandir(path))
+            entries.append((os.path.getmtime(os.path.join(path, 'meta.json')), size, path))
+        except OSError:
+            continue
+    total = sum(e[1] for e in entries); freed = 0
+    for _, size, path in sorted(entries):
+        if total - freed <= max_bytes: break
+        shutil.rmtree(path, ignore_errors=True); freed += size
+    return freed
@@ -0,0 +1,96 @@
+# cli.py
+"""
+Headless batch runner: ingest -> expanding PCA -> regimes -> HY/IG strategy ->
+exports for one or many workbooks, processed in parallel across cores.
+"""
+import argparse, json, os, sys, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+
+from .utils import bytes_hash
+from . import data_ingest, pca as pca_mod, pipeline, cache as disk_cache
+from .analytics import get_analytics
+from .exporters import export_labels_basic, export_labels_strategy
+
+def run_workbook(path: str, out_dir: str, minp_z: int = 24, backend: str = 'auto', use_cache: bool = True, window: int = None,
+                 ragged: bool = False) -> dict:
+    """
+    Run the full pipeline for one workbook and write its outputs to
+    `out_dir/<stem>_<hash>_<config hash>/` (one directory per workbook and
+    settings, so runs with other settings do not overwrite it): regime labels
+    (PC/EVR/regime CSV), the two label workbooks when returns are present,
+    and timings.json. Returns a summary row.
+    `window` switches the PCA to a rolling lookback of that many months;
+    `ragged` keeps months with missing series (pairwise PCA moments).
+    """
+    timings = {}; clock = time.perf_counter
+    def stage(name, t0): timings[name] = round(clock() - t0, 4)
+
+    t0 = clock()
+    with open(path, 'rb') as fh: data = fh.read()
+    key = bytes_hash(data); stage('read', t0)
+
+    t0 = clock()
+    pkey = disk_cache.entry_key('parse', key, minp_z, *(['ragged'] if ragged else []))
+    hit = disk_cache.load(pkey) if use_cache else None
+    if hit is not None:
+        Z, returns = hit['Z'], hit['returns']
+    else:
+        sheets, Z, returns = data_ingest.parse_workbook(data, prefer_raw=True, minp_z=minp_z, backend=backend, ragged=ragged)
+        if use_cache: disk_cache.store(pkey, {'sheets': sheets, 'Z': Z, 'returns': returns})
+    stage('ingest', t0)
+
+    t0 = clock()
+    cfg = {**pca_mod.DEFAULT_CONFIG, 'window': window, 'missing': 'pairwise' if ragged else 'drop'}
+    pca_tl, PC, EVR, _, regime, how = pipeline.pca_and_regime(Z, key, minp_z, cfg, use_cache=use_cache)
+    stage('pca', t0)
+    regime = regime.dropna()
+
+    chash = disk_cache.config_hash({**cfg, 'minp_z': minp_z})
+    dest = os.path.join(out_dir, f'{os.path.splitext(os.path.basename(path))[0]}_{key[:8]}_{chash[:8]}')
+    os.makedirs(dest, exist_ok=True)
+    t0 = clock()
+    PC.join(EVR).join(regime, how='left').to_csv(os.path.join(dest, 'pc_regime.csv'), index_label='Date')
+    if returns is not None:
+        res = get_analytics(returns, regime); res.strategy; stage('strategy', t0); t0 = clock()
+        for name, fn in [('Regime_RiskOn_Labels.xlsx', export_labels_basic),
+                         ('Regime_RiskOn_Sleeve_Strategy.xlsx', export_labels_strategy)]:
+            fn(returns, regime, out=os.path.join(dest, name))
+    stage('export', t0)
+
+    timings['total'] = round(sum(timings.values()), 4)
+    row = {'file': path, 'hash': key, 'months': len(Z), 'factors': Z.shape[1],
+           'last_date': str(PC.index[-1].date()) if len(PC) else '', 'last_regime': str(regime.iloc[-1]) if len(regime) else '',
+           'has_returns': returns is not None, 'pca': how, 'config': chash, 'out': dest, **{f't_{k}': v for k, v in timings.items()}}
+    with open(os.path.join(dest, 'timings.json'), 'w', encoding='utf-8') as fh: json.dump(row, fh, indent=2)
+    return row
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog='pca_regime_app', description='Run the PCA regime pipeline on workbooks without the UI.')
+    ap.add_argument('workbooks', nargs='+', help='Excel workbook path(s)')
+    ap.add_argument('-o', '--out', default='pca_regime_out', help='output directory (default: %(default)s)')
+    ap.add_argument('--minp-z', type=int, default=24, help='min periods for expanding z-scores when Inputs are used')
+    ap.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='parallel worker processes')
+    ap.add_argument('--backend', choices=['auto', 'openpyxl', 'calamine'], default='auto', help='Excel reader backend')
+    ap.add_argument('--window', type=int, default=None, help='rolling PCA lookback in months (default: expanding)')
+    ap.add_argument('--ragged', action='store_true', help='keep months with missing series (pairwise PCA; expanding only)')
+    ap.add_argument('--no-cache', action='store_true', help='do not read or write the on-disk result cache')
+    a = ap.parse_args(argv)
+    if a.ragged and a.window is not None: ap.error('--ragged needs the expanding PCA; drop --window')
+
+    os.makedirs(a.out, exist_ok=True)
+    kw = dict(out_dir=a.out, minp_z=a.minp_z, backend=a.backend, use_cache=not a.no_cache, window=a.window, ragged=a.ragged)
+    rows = []
+    with ProcessPoolExecutor(max_workers=max(1, min(a.jobs, len(a.workbooks)))) as ex:
+        futs = {ex.submit(run_workbook, p, **kw): p for p in a.workbooks}
+        for f in as_completed(futs):
+            try:
+                row = f.result(); row['status'] = 'ok'
+            except Exception as e:
+                row = {'file': futs[f], 'status': f'error: {e}'}
+            rows.append(row)
+            print(f"{row['status']:>6}  {row['file']}  {row.get('t_total', '')}", file=sys.stderr)
+    summary = pd.DataFrame(rows).sort_values('file')
+    summary.to_csv(os.path.join(a.out, 'summary.csv'), index=False)
+    print(summary.to_string(index=False))
+    return 0 if all(r['status'] == 'ok' for r in rows) else 1
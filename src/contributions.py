@@ -0,0 +1,70 @@
+# contributions.py
+"""
+Factor contributions to the PC scores: z[t, i] * loading[t, i, k] for every
+date, factor and component, from the Z matrix and the oriented loadings
+timeline of pca_timeline in one einsum. SMA aggregation and group roll-ups
+work on the whole (T x N x k) tensor at once (cumulative sums / one
+factor-to-group matrix product), not per date.
+"""
+import numpy as np, pandas as pd
+from .instrument import traced
+
+# Bloomberg yellow keys: the default factor groups ('SPX Index' -> 'Index')
+YELLOW_KEYS = ('Index', 'Govt', 'Curncy', 'Comdty', 'Corp', 'Equity', 'Mtge', 'Muni', 'Pfd')
+
+def default_groups(columns) -> pd.Series:
+    """Group label per factor: its Bloomberg yellow key, 'Other' when it has none."""
+    last = [str(c).split()[-1] if str(c).split() else '' for c in columns]
+    return pd.Series([k if k in YELLOW_KEYS else 'Other' for k in last], index=pd.Index(columns), name='Group')
+
+@traced
+def contribution_tensor(Z: pd.DataFrame, res: dict, rows: slice = slice(None)) -> np.ndarray:
+    """(T, N, k) contributions on res['index'][rows] / res['columns']; missing z count as 0, NaN where no fit exists."""
+    X = Z.reindex(index=res['index'][rows], columns=res['columns']).to_numpy(dtype=float)
+    return np.einsum('tn,tnk->tnk', np.nan_to_num(X), res['loadings'][rows])
+
+def sma(C: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over `window` dates along axis 0, averaging the dates in the window that have a fit."""
+    ok = ~np.isnan(C)
+    cs = np.concatenate([np.zeros((1,) + C.shape[1:]), np.cumsum(np.where(ok, C, 0.0), axis=0)])
+    cn = np.concatenate([np.zeros((1,) + C.shape[1:]), np.cumsum(ok, axis=0)])
+    hi = np.arange(1, len(C)+1); lo = np.maximum(hi - window, 0)
+    n = cn[hi] - cn[lo]
+    with np.errstate(invalid='ignore', divide='ignore'): return np.where(n > 0, (cs[hi] - cs[lo])/n, np.nan)
+
+def group_rollup(C: np.ndarray, columns, groups) -> tuple:
+    """Sum (T, N, k) contributions into (T, G, k) by group; `groups` maps factor -> label (unmapped: 'Other')."""
+    labels = pd.Series(groups).reindex(pd.Index(columns)).fillna('Other').astype(str)
+    codes, names = pd.factorize(labels)
+    G = np.zeros((len(codes), len(names))); G[np.arange(len(codes)), codes] = 1.0
+    return np.einsum('tnk,ng->tgk', C, G), pd.Index(names, name='Group')
+
+@traced
+def contributions(Z: pd.DataFrame, res: dict, sma_window: int = None, groups=None) -> dict:
+    """
+    Full-history contributions as {'PC1': DataFrame, 'PC2': ...} (dates x
+    factors, or dates x groups when `groups` is given: a factor -> label
+    mapping, e.g. default_groups(Z.columns)). `sma_window` applies the
+    trailing SMA first, as the regime signal does with the scores.
+    """
+    C = contribution_tensor(Z, res); cols = pd.Index(res['columns'])
+    if sma_window: C = sma(C, sma_window)
+    if groups is not None: C, cols = group_rollup(C, cols, groups)
+    return {f'PC{j+1}': pd.DataFrame(C[:, :, j], index=res['index'], columns=cols) for j in range(C.shape[2])}
+
+@traced
+def current(Z: pd.DataFrame, res: dict, PC: pd.DataFrame, regime: pd.Series, window: int = 5):
+    """
+    Contributions to the SMA(window) scores on the last date with a valid SMA
+    and regime: {'C1', 'C2' (per factor), 'date', 'regime_now'}; None if there
+    is no such date.
+    """
+    valid = PC[[f'PC1_SMA{window}', f'PC2_SMA{window}']].notna().all(axis=1) & regime.reindex(PC.index).notna()
+    if not valid.any(): return None
+    t0 = PC.index[valid][-1]; i = res['index'].get_loc(t0)
+    lo = max(0, i - window + 1)
+    C = sma(contribution_tensor(Z, res, slice(lo, i+1)), window)[-1]
+    if np.isnan(C).all(): return None
+    cols = pd.Index(res['columns'])
+    return {'C1': pd.Series(C[:, 0], index=cols), 'C2': pd.Series(C[:, 1], index=cols),
+            'date': str(t0.date()), 'regime_now': str(regime.loc[t0])}
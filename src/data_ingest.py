@@ -1,6 +1,11 @@
 # data_ingest.py
+import contextlib
+import datetime as dt
 import io
+import numpy as np
 import pandas as pd
+from pandas.io.parsers import TextParser
+from .instrument import traced
 
 # ---------------------------
 # Constants & simple helpers
@@ -34,13 +39,18 @@ def _coerce_numeric(df: pd.DataFrame) -> pd.DataFrame:
         out[c] = pd.to_numeric(out[c], errors='coerce')
     return out
 
+@traced
 def read_excel_bytes(xls_bytes: bytes) -> pd.ExcelFile:
     """Turn Streamlit's uploaded BytesIO into a pandas.ExcelFile."""
     return pd.ExcelFile(io.BytesIO(xls_bytes), engine='openpyxl')
 
+@traced
 def detect_sheets(xf: pd.ExcelFile):
     """Identify likely sheet names using flexible matching."""
-    names = [str(s) for s in xf.sheet_names]
+    return _match_sheets(xf.sheet_names)
+
+def _match_sheets(sheet_names) -> dict:
+    names = [str(s) for s in sheet_names]
     lower_map = {str(s).strip().lower(): s for s in names}
 
     def find(cands):
@@ -89,7 +99,10 @@ def _load_z_or_x_scores(xf: pd.ExcelFile, drop_leading_zero_row: bool = True) ->
 
     header_row = _find_header_row(xf, sheet)
     df = pd.read_excel(xf, sheet_name=sheet, header=header_row, engine='openpyxl')
+    return _scores_from_frame(df, drop_leading_zero_row)
 
+def _scores_from_frame(df: pd.DataFrame, drop_leading_zero_row: bool = True) -> pd.DataFrame:
+    """Normalize a freshly read X/Z-Scores sheet (header already applied)."""
     # Normalize headers
     df.columns = [str(c).strip() for c in df.columns]
 
@@ -122,13 +135,15 @@ def _load_z_or_x_scores(xf: pd.ExcelFile, drop_leading_zero_row: bool = True) ->
 # ---------------------------
 # Public API
 # ---------------------------
-def load_variables(xf: pd.ExcelFile, prefer_raw: bool = True, minp_z: int = 24) -> pd.DataFrame:
+@traced
+def load_variables(xf: pd.ExcelFile, prefer_raw: bool = True, minp_z: int = 24, ragged: bool = False) -> pd.DataFrame:
     """
     Load the factor matrix for PCA/regime modelling.
     Behavior:
       1) If an X-Scores or Z-Scores tab exists, use it (preferred).
       2) Else, if `prefer_raw` is True and a raw 'Variables/Inputs' tab exists,
-         compute Z-scores by expanding mean/std (minp_z).
+         compute Z-scores by expanding mean/std (minp_z; ragged=True keeps
+         months where some series are missing, see _z_from_raw).
       3) Else, raise a clear error.
     """
     sheets = detect_sheets(xf)
@@ -140,23 +155,34 @@ def load_variables(xf: pd.ExcelFile, prefer_raw: bool = True, minp_z: int = 24)
     # 2) Fall back to computing Z from raw variables if explicitly allowed
     if prefer_raw and sheets['raw'] is not None:
         RAW = pd.read_excel(xf, sheet_name=sheets['raw'], engine='openpyxl')
-        dc = _detect_date_col(RAW)
-        RAW = _month_end_collapse(RAW, dc)
-        # Coerce numerics and remove incomplete rows so expanding stats behave well
-        RAW = _coerce_numeric(RAW).dropna(how='all', axis=1)
-        RAW = RAW.dropna(how='any')
-
-        mu = RAW.expanding(min_periods=minp_z).mean()
-        sd = RAW.expanding(min_periods=minp_z).std(ddof=0)
-        Z = (RAW - mu) / sd
-        Z = Z.dropna(how='any')
-        return Z
+        return _z_from_raw(RAW, minp_z, ragged)
 
     # 3) Nothing suitable found
     raise ValueError(
         "Workbook must contain 'X-Scores'/'Z-Scores' or a raw 'Variables/Inputs' sheet."
     )
 
+def _z_from_raw(RAW: pd.DataFrame, minp_z: int, ragged: bool = False) -> pd.DataFrame:
+    """
+    Expanding z-scores (min_periods=minp_z) from a raw 'Variables/Inputs' sheet.
+    ragged=True keeps every month: each series is standardised over its own
+    observations (a late-starting series has NaN z-scores until it has minp_z
+    of them) instead of cutting all series to the rows where every one exists.
+    """
+    dc = _detect_date_col(RAW)
+    RAW = _month_end_collapse(RAW, dc)
+    # Coerce numerics and remove incomplete rows so expanding stats behave well
+    RAW = _coerce_numeric(RAW).dropna(how='all', axis=1)
+    if not ragged: RAW = RAW.dropna(how='any')
+
+    # expanding windows skip NaN per column, so the ragged panel needs no copies or masks here
+    mu = RAW.expanding(min_periods=minp_z).mean()
+    sd = RAW.expanding(min_periods=minp_z).std(ddof=0)
+    Z = (RAW - mu) / sd
+    Z = Z.dropna(how='all' if ragged else 'any')
+    return Z
+
+@traced
 def load_returns(xf: pd.ExcelFile) -> pd.DataFrame:
     """
     Load HY/IG/EMBI *monthly returns* from the 'Returns' sheet.
@@ -172,6 +198,14 @@ def load_returns(xf: pd.ExcelFile) -> pd.DataFrame:
         raise ValueError('Returns sheet not found.')
 
     R = pd.read_excel(xf, sheet_name=sheets['ret'], engine='openpyxl')
+    return _returns_from_frame(R)
+
+def _returns_from_frame(R: pd.DataFrame, require=None):
+    """
+    Select/rename the monthly return columns of a freshly read Returns sheet.
+    With `require`, return None instead if any of those columns is dropped as
+    all-NaN (the caller then re-reads the full sheet for the fallbacks).
+    """
     R.columns = [str(c).strip() for c in R.columns]
 
     # Use the first/leftmost Date-like column as the master date
@@ -182,6 +216,8 @@ def load_returns(xf: pd.ExcelFile) -> pd.DataFrame:
     drop_cols = [c for c in R.columns if R[c].isna().all()]
     if drop_cols:
         R = R.drop(columns=drop_cols)
+    if require is not None and any(c not in R.columns for c in require):
+        return None
 
     # 1) Prefer explicit monthly return columns with '.1' suffix
     preferred = {
@@ -224,4 +260,140 @@ def load_returns(xf: pd.ExcelFile) -> pd.DataFrame:
             "Monthly return magnitudes look wrong—likely read levels instead of returns."
         )
 
-    return out
\ No newline at end of file
+    return out
+
+# ---------------------------
+# Single-open fast path
+# ---------------------------
+_EXCEL_ERRORS = {'#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A'}
+_RETURN_BASES = ['EMBI GD HY', 'EMBI GD IG', 'EMBI GD']
+
+def _cell(v):
+    """Cell conversion used by pandas' openpyxl reader: None -> '', whole numbers -> int, errors -> NaN."""
+    if v is None: return ''
+    if isinstance(v, bool): return v
+    if isinstance(v, (int, float)):
+        i = int(v)
+        return i if i == v else float(v)
+    if isinstance(v, str) and v in _EXCEL_ERRORS: return np.nan
+    if isinstance(v, dt.date) and not isinstance(v, dt.datetime): return dt.datetime(v.year, v.month, v.day)
+    return v
+
+def _header_names(row: list) -> list:
+    """pandas header naming: '' -> 'Unnamed: i', duplicates -> 'name.1', 'name.2', ..."""
+    names = [c if c != '' else f'Unnamed: {i}' for i, c in enumerate(row)]
+    counts = {}
+    for i, col in enumerate(names):
+        cur = counts.get(col, 0)
+        while cur > 0:
+            counts[col] = cur + 1; col = f'{col}.{cur}'; cur = counts.get(col, 0)
+        names[i] = col; counts[col] = cur + 1
+    return names
+
+@contextlib.contextmanager
+def _open_workbook(xls_bytes: bytes, backend: str = 'auto'):
+    """
+    Open the workbook once, as a context manager yielding (sheet_names, rows)
+    where rows(sheet) streams raw cell values row by row; the workbook (and
+    openpyxl's zip handle) is closed on exit. backend: 'calamine'
+    (python-calamine, much faster parsing), 'openpyxl' (read-only streaming)
+    or 'auto' (calamine when installed).
+    """
+    wb = None
+    if backend in ('auto', 'calamine'):
+        try:
+            from python_calamine import CalamineWorkbook
+        except ImportError:
+            if backend == 'calamine': raise
+        else:
+            wb = CalamineWorkbook.from_filelike(io.BytesIO(xls_bytes))
+            names, rows = wb.sheet_names, lambda s: iter(wb.get_sheet_by_name(s).to_python(skip_empty_area=False))
+    if wb is None:
+        import openpyxl
+        wb = openpyxl.load_workbook(io.BytesIO(xls_bytes), read_only=True, data_only=True, keep_links=False)
+        def rows(s):
+            ws = wb[s]; ws.reset_dimensions()
+            return ws.iter_rows(values_only=True)
+        names = wb.sheetnames
+    try:
+        yield names, rows
+    finally:
+        if hasattr(wb, 'close'): wb.close()
+
+def _read_table(rows, header=None, want=None, max_scan: int = 12) -> pd.DataFrame:
+    """
+    One streaming pass over a sheet, equivalent to pd.read_excel(header=...).
+    header=None finds the header like _find_header_row (first row holding 'Date'
+    within `max_scan` rows). want(names) -> column positions to materialize
+    (None = all); other columns are never converted or parsed.
+    """
+    it = iter(rows); head = []
+    for row in it:
+        head.append(row)
+        if len(head) >= max_scan: break
+    if header is None:
+        header = next((r for r, row in enumerate(head)
+                       if any(isinstance(v, str) and v.strip().lower() == 'date' for v in row)), 0)
+    hdr = [_cell(v) for v in head[header]] if header < len(head) else []
+    while hdr and hdr[-1] == '': hdr.pop()
+    names = _header_names(hdr)
+    keep = want(names) if want is not None else None
+
+    data, last, width = [], -1, len(hdr)
+    for r, row in enumerate(_chain(head[header+1:], it)):
+        n = len(row)
+        while n and _cell(row[n-1]) == '': n -= 1
+        if n: last = r; width = max(width, n)
+        data.append([row[i] if i < n else None for i in keep] if keep is not None else row[:n])
+    data = data[:last+1]
+    if keep is None:
+        names = _header_names(hdr + [''] * (width - len(hdr))); keep = range(width)
+        data = [list(row) + [None] * (width - len(row)) for row in data]
+    data = [[_cell(v) for v in row] for row in data]
+    return TextParser(data, names=[names[i] for i in keep], header=None, skip_blank_lines=False).read()
+
+def _chain(first, rest):
+    yield from first
+    yield from rest
+
+def _returns_want(names):
+    """Positions of the date column and the three monthly return columns, or None if not found by name."""
+    cols = [str(c).strip() for c in names]
+    dc = next((i for i, c in enumerate(cols) if c.lower() in DATE_NAMES), 0)
+    pref = [cols.index(b + '.1') for b in _RETURN_BASES if b + '.1' in cols]
+    return [dc] + pref if len(pref) == 3 else None
+
+@traced
+def parse_workbook(xls_bytes: bytes, prefer_raw: bool = True, minp_z: int = 24, backend: str = 'auto', ragged: bool = False):
+    """
+    Fast ingestion: open the workbook once and read each needed sheet in a
+    single streaming pass, materializing only the columns that are used.
+    Returns (sheets, Z, returns) equal to detect_sheets / load_variables /
+    load_returns on a pandas.ExcelFile; returns is None if the Returns sheet
+    is missing or unusable. `ragged` as in load_variables.
+    """
+    with _open_workbook(xls_bytes, backend) as (sheet_names, rows):
+        sheets = _match_sheets(sheet_names)
+
+        sheet = sheets.get('x') or sheets.get('z')
+        if sheet:
+            Z = _scores_from_frame(_read_table(rows(sheet)), drop_leading_zero_row=True)
+        elif prefer_raw and sheets['raw'] is not None:
+            Z = _z_from_raw(_read_table(rows(sheets['raw']), header=0), minp_z, ragged)
+        else:
+            raise ValueError(
+                "Workbook must contain 'X-Scores'/'Z-Scores' or a raw 'Variables/Inputs' sheet."
+            )
+
+        returns = None
+        if sheets['ret'] is not None:
+            try:
+                R = _read_table(rows(sheets['ret']), header=0, want=_returns_want)
+                need = [b + '.1' for b in _RETURN_BASES]
+                subset = all(c in [str(n).strip() for n in R.columns] for c in need)
+                returns = _returns_from_frame(R, require=need if subset else None)
+                if returns is None:
+                    returns = _returns_from_frame(_read_table(rows(sheets['ret']), header=0))
+            except Exception:
+                returns = None
+    return sheets, Z, returns
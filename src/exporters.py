@@ -1,26 +1,78 @@
-import io, pandas as pd
-
-def export_labels_basic(returns: pd.DataFrame, regime: pd.Series) -> bytes:
-    idx = returns.index.intersection(regime.index); reg = regime.reindex(idx); risk = reg.isin({'Goldilocks','Reflation'}).astype('boolean')
-    df = pd.DataFrame({'Date':idx,'Regime':reg.values,'Risk_On':risk.values})
-    buf=io.BytesIO()
-    with pd.ExcelWriter(buf, engine='openpyxl') as w:
-        df.to_excel(w, index=False, sheet_name='Labels')
-        (returns[['HY','IG']].groupby(reg).mean()).to_excel(w, sheet_name='AvgByRegime')
-        (returns[['HY','IG']].groupby(risk).mean()).to_excel(w, sheet_name='AvgByRisk')
-    buf.seek(0); return buf.read()
-
-def export_labels_strategy(returns: pd.DataFrame, regime: pd.Series) -> bytes:
-    idx = returns.index.intersection(regime.index); ret=returns[['HY','IG']].reindex(idx).copy(); reg=regime.reindex(idx)
-    risk=reg.isin({'Goldilocks','Reflation'}).astype('boolean'); sig=reg.shift(1)
-    hy=sig.isin({'Goldilocks','Reflation'}).astype(float); ig=1.0-hy
-    sleeve=(hy==1.0).map({True:'HY',False:'IG'})
-    strat=hy*ret['HY']+ig*ret['IG']
-    out=pd.DataFrame({'Date':idx,'Regime':reg.values,'Risk_On':risk.values,'Sleeve':sleeve.values,'HY_Return':ret['HY'].values,'IG_Return':ret['IG'].values,'Strategy_Return':strat.values})
+import io, numpy as np, pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from .regimes import risk_on_mask
+from .analytics import get_analytics
+from .instrument import traced
+
+FORMATS = {'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+           'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+
+# ---------------------------
+# Writers
+# ---------------------------
+def _value(v):
+    if v is None or v is pd.NA or v is pd.NaT or (isinstance(v, float) and v != v): return None
+    return v.item() if isinstance(v, np.generic) else v
+
+def _xlsx(tables: dict, target) -> None:
+    """Write-only (streaming) workbook: rows go straight to the zip, never held as a cell grid."""
+    wb = Workbook(write_only=True); bold = Font(bold=True)
+    for name, df in tables.items():
+        ws = wb.create_sheet(name)
+        head = []
+        for c in df.columns:
+            cell = WriteOnlyCell(ws, value=str(c)); cell.font = bold; head.append(cell)
+        ws.append(head)
+        for row in df.itertuples(index=False, name=None): ws.append([_value(v) for v in row])
+    wb.save(target)
+
+def write_tables(tables: dict, fmt: str = 'xlsx', out=None):
+    """
+    Write {sheet_name: DataFrame} as one workbook ('xlsx'), or the first table
+    alone as 'csv' / 'parquet' (parquet needs pyarrow). `out` is a path or a
+    binary file object written to directly; without it the file comes back as
+    bytes (BytesIO.getvalue, no second copy of the buffer).
+    """
+    if fmt not in FORMATS: raise ValueError(f"Unknown export format {fmt!r}; use one of {list(FORMATS)}.")
+    target = io.BytesIO() if out is None else out
+    if fmt == 'xlsx': _xlsx(tables, target)
+    else:
+        df = next(iter(tables.values()))
+        if fmt == 'csv': df.to_csv(target, index=False, encoding='utf-8')
+        else:
+            try: df.to_parquet(target, index=False)
+            except ImportError as e: raise ImportError('Parquet export needs pyarrow: pip install pyarrow') from e
+    return target.getvalue() if out is None else None
+
+# ---------------------------
+# Exports
+# ---------------------------
+def _labels_tables(returns: pd.DataFrame, regime: pd.Series) -> dict:
+    idx = returns.index.intersection(regime.index); reg = regime.reindex(idx); risk = pd.Series(risk_on_mask(reg), index=idx, dtype='boolean', name=reg.name)
+    return {'Labels': pd.DataFrame({'Date':idx,'Regime':reg.values,'Risk_On':risk.values}),
+            'AvgByRegime': returns[['HY','IG']].groupby(reg, observed=True).mean().reset_index(),
+            'AvgByRisk': returns[['HY','IG']].groupby(risk).mean().reset_index()}
+
+def _strategy_tables(returns: pd.DataFrame, regime: pd.Series) -> dict:
+    # Signal/sleeve logic lives in hy_ig_strategy; reuse the memoized result
+    res = get_analytics(returns, regime)
+    idx = res.strat_ret.index; ret=returns[['HY','IG']].reindex(idx); reg=regime.reindex(idx)
+    risk=pd.Series(risk_on_mask(reg), index=idx, dtype='boolean', name=reg.name)
+    out=pd.DataFrame({'Date':idx,'Regime':reg.values,'Risk_On':risk.values,'Sleeve':np.where(res.w_hy.values==1.0,'HY','IG'),
+                      'HY_Return':ret['HY'].values,'IG_Return':ret['IG'].values,'Strategy_Return':res.strat_ret.values})
     if 'EMBI' in returns.columns: out['EMBI_Return']=returns['EMBI'].reindex(idx).values
-    buf=io.BytesIO()
-    with pd.ExcelWriter(buf, engine='openpyxl') as w:
-        out.to_excel(w, index=False, sheet_name='Labels_And_Strategy')
-        (ret.groupby(reg).mean()).to_excel(w, sheet_name='AvgByRegime_HY_IG')
-        (ret.groupby(risk)[['HY','IG']].mean()).to_excel(w, sheet_name='AvgByRisk_HY_IG')
-    buf.seek(0); return buf.read()
+    return {'Labels_And_Strategy': out,
+            'AvgByRegime_HY_IG': ret.groupby(reg, observed=True).mean().reset_index(),
+            'AvgByRisk_HY_IG': ret.groupby(risk)[['HY','IG']].mean().reset_index()}
+
+@traced
+def export_labels_basic(returns: pd.DataFrame, regime: pd.Series, fmt: str = 'xlsx', out=None):
+    """Date / Regime / Risk_On labels plus HY/IG means by regime and by risk state (see write_tables for fmt/out)."""
+    return write_tables(_labels_tables(returns, regime), fmt, out)
+
+@traced
+def export_labels_strategy(returns: pd.DataFrame, regime: pd.Series, fmt: str = 'xlsx', out=None):
+    """Labels with sleeve and strategy/asset returns plus the HY/IG summaries (see write_tables for fmt/out)."""
+    return write_tables(_strategy_tables(returns, regime), fmt, out)
@@ -0,0 +1,141 @@
+# instrument.py
+"""
+Lightweight stage instrumentation for the public src functions.
+
+Decorated functions cost one check when profiling is off everywhere. When on,
+each call records wall time, input shapes and (optionally, via tracemalloc)
+the net allocation and peak. Records can be summarised, exported as JSON or
+as a Chrome trace (chrome://tracing, Perfetto).
+
+Profiling is switched on per owner: a Streamlit session (sidebar panel on any
+page) records the calls of its own script runs and of the background jobs it
+subscribes to, into its own records. Owner None (PCA_APP_PROFILE=1, the CLI,
+benchmarks) records every call in the process. tracemalloc runs while at least
+one owner tracks allocations.
+"""
+import contextlib, functools, json, os, threading, time, tracemalloc
+from collections import deque
+import pandas as pd
+
+from .registry import OWNER_TTL, session_id
+
+MAX_RECORDS = 50_000
+_on = {}; _seen = {}; _records = {}; _lock = threading.Lock(); _local = threading.local()   # owner -> track_memory / last seen / deque
+if os.environ.get('PCA_APP_PROFILE', '') not in ('', '0'): _on[None] = False; _records[None] = deque(maxlen=MAX_RECORDS)
+
+def _shape(x):
+    if hasattr(x, 'shape'): return list(x.shape)
+    if isinstance(x, (bytes, bytearray, memoryview)): return [len(x)]
+    return None
+
+def _targets() -> list:
+    """Owners with profiling on that the calling thread works for."""
+    owners = getattr(_local, 'owners', None)
+    owners = tuple(owners) if owners is not None else (session_id(),)
+    out = [o for o in owners if o is not None and o in _on]
+    return out + [None] if None in _on else out
+
+def _call(name, fn, args, kwargs, targets):
+    depth = getattr(_local, 'depth', 0); mem = tracemalloc.is_tracing()
+    if mem:
+        if depth == 0: tracemalloc.reset_peak()
+        cur0, _ = tracemalloc.get_traced_memory()
+    shapes = {f'arg{i}': s for i, s in enumerate(map(_shape, args)) if s is not None}
+    shapes.update({k: s for k, s in ((k, _shape(v)) for k, v in kwargs.items()) if s is not None})
+    _local.depth = depth + 1; t0 = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        dur = time.perf_counter() - t0; _local.depth = depth
+        rec = {'name': name, 'start': t0, 'dur': dur, 'depth': depth, 'thread': threading.get_ident(), 'shapes': shapes}
+        if mem:
+            cur1, peak = tracemalloc.get_traced_memory()
+            rec['alloc_bytes'] = cur1 - cur0; rec['peak_bytes'] = peak - cur0
+        for o in targets:
+            q = _records.get(o)
+            if q is not None: q.append(rec)
+
+def traced(fn):
+    """Decorator: record calls of `fn` for the owners that have profiling enabled."""
+    name = f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _on: return fn(*args, **kwargs)
+        targets = _targets()
+        if not targets: return fn(*args, **kwargs)
+        return _call(name, fn, args, kwargs, targets)
+    return wrapper
+
+@contextlib.contextmanager
+def acting_for(owners):
+    """Attribute calls in this thread to `owners` (a live collection, e.g. a job's subscribers)."""
+    prev = getattr(_local, 'owners', None); _local.owners = owners
+    try: yield
+    finally: _local.owners = prev
+
+def _sync_tracemalloc() -> None:
+    want = any(_on.values())
+    if want and not tracemalloc.is_tracing(): tracemalloc.start()
+    if not want and tracemalloc.is_tracing(): tracemalloc.stop()
+
+def enabled(owner=None) -> bool:
+    return owner in _on
+
+def enable(track_memory: bool = False, owner=None) -> None:
+    with _lock:
+        _on[owner] = bool(track_memory); _records.setdefault(owner, deque(maxlen=MAX_RECORDS)); _sync_tracemalloc()
+
+def disable(owner=None) -> None:
+    with _lock: _on.pop(owner, None); _sync_tracemalloc()
+
+def _expire() -> None:
+    """Switch off sessions whose panel has not been seen for OWNER_TTL seconds (closed tabs)."""
+    now = time.time()
+    with _lock:
+        for o in [o for o, t in _seen.items() if now - t > OWNER_TTL]:
+            del _seen[o]; _on.pop(o, None); _records.pop(o, None)
+        _sync_tracemalloc()
+
+def clear(owner=None) -> None:
+    q = _records.get(owner)
+    if q is not None: q.clear()
+
+def records(owner=None) -> list:
+    return list(_records.get(owner, ()))
+
+def summary(owner=None) -> pd.DataFrame:
+    """Per-function totals: calls, total/mean/max seconds, net allocation (MB) and last input shapes."""
+    df = pd.DataFrame(records(owner))
+    if df.empty: return pd.DataFrame(columns=['calls', 'total_s', 'mean_s', 'max_s', 'alloc_mb', 'last_shapes'])
+    if 'alloc_bytes' not in df: df['alloc_bytes'] = float('nan')
+    g = df.groupby('name')
+    out = pd.DataFrame({'calls': g.size(), 'total_s': g['dur'].sum(), 'mean_s': g['dur'].mean(), 'max_s': g['dur'].max(),
+                        'alloc_mb': g['alloc_bytes'].sum(min_count=1)/2**20, 'last_shapes': g['shapes'].last().map(json.dumps)})
+    return out.sort_values('total_s', ascending=False)
+
+def to_json(owner=None) -> str:
+    return json.dumps(records(owner), indent=1)
+
+def to_chrome_trace(owner=None) -> str:
+    """Records as Chrome trace-event JSON (complete 'X' events, microseconds)."""
+    pid = os.getpid()
+    ev = [{'name': r['name'], 'cat': r['name'].split('.', 1)[0], 'ph': 'X', 'ts': r['start']*1e6, 'dur': r['dur']*1e6,
+           'pid': pid, 'tid': r['thread'], 'args': {k: v for k, v in r.items() if k in ('shapes', 'alloc_bytes', 'peak_bytes')}}
+          for r in records(owner)]
+    return json.dumps({'traceEvents': ev, 'displayTimeUnit': 'ms'})
+
+def sidebar_panel() -> None:
+    """Streamlit sidebar expander: this session's on/off switch, per-stage table and JSON / Chrome-trace downloads."""
+    import streamlit as st
+    sid = session_id(); _seen[sid] = time.time(); _expire()
+    with st.sidebar.expander('Profiler', expanded=enabled(sid)):
+        on = st.toggle('Record stage timings', value=enabled(sid) or None in _on, key='_profiler_on')
+        mem = st.checkbox('Track allocations (slower)', value=_on.get(sid, False), key='_profiler_mem', disabled=not on)
+        if on: enable(track_memory=mem, owner=sid)
+        elif enabled(sid): disable(sid)
+        if not _records.get(sid):
+            st.caption('No calls recorded yet; interact with a page after switching on.'); return
+        st.dataframe(summary(sid)[['calls', 'total_s', 'max_s', 'alloc_mb']].style.format(precision=4), use_container_width=True)
+        st.download_button('Download JSON', to_json(sid), file_name='profile.json', mime='application/json')
+        st.download_button('Download Chrome trace', to_chrome_trace(sid), file_name='trace.json', mime='application/json')
+        if st.button('Clear records'): clear(sid); st.rerun()
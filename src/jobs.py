@@ -0,0 +1,171 @@
+# jobs.py
+"""
+Background jobs for the Streamlit pages. Long stages (expanding PCA, report
+rendering) run on a process-wide thread pool instead of inside the script
+run, so the app stays responsive and a job survives navigating away.
+
+A job function is called as fn(*args, progress=cb, **kwargs): it reports
+progress with cb(done, total), and cb raises Cancelled once the job has been
+cancelled, so cancellation takes effect at the next step. The function
+returns a dict of session-state entries; sidebar_panel (on every page)
+publishes it into the sessions subscribed to the job once it is done.
+
+Jobs are shared: submitting a key that is already running joins that job,
+and every session tracking it is a subscriber. Cancel detaches only the
+calling session; the work itself stops when its last subscriber leaves.
+"""
+import itertools, threading, time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .instrument import acting_for
+from .registry import Abandoned, _view, session_id
+
+MAX_WORKERS = 2
+MAX_JOBS = 64        # finished jobs kept for sessions that have not collected them yet
+POLL_S = 0.5
+
+class Cancelled(Abandoned):
+    """Raised by a job's progress callback after Job.cancel()."""
+
+class Job:
+    def __init__(self, key, label: str, unit: str):
+        self.id = next(_ids); self.key = key; self.label = label; self.unit = unit
+        self.status = 'queued'; self.done = 0; self.total = 0
+        self.result = None; self.error = None; self.submitted = time.time(); self.finished = None
+        self.future = None; self._cancel = threading.Event(); self.subscribers = set()
+
+    def progress(self, done: int, total: int) -> None:
+        if self._cancel.is_set(): raise Cancelled(self.label)
+        self.done, self.total = int(done), int(total)
+
+    def subscribe(self, owner) -> None:
+        with _lock: self.subscribers.add(owner)
+
+    def cancel(self, owner=None) -> bool:
+        """
+        Detach `owner`; the work is stopped (True) only once no subscriber is
+        left. owner=None stops it for everyone.
+        """
+        with _lock:
+            self.subscribers.discard(owner)
+            if owner is not None and self.subscribers: return False
+            self._cancel.set()
+        if self.future is not None and self.future.cancel(): self.status = 'cancelled'; self.finished = time.time()
+        return True
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block up to `timeout` seconds; True once the job is no longer queued or running."""
+        try: self.future.result(timeout)
+        except Exception: pass     # timeout, or the job's own error (kept in self.error)
+        return not self.active
+
+    @property
+    def active(self) -> bool: return self.status in ('queued', 'running')
+
+    @property
+    def fraction(self) -> float: return min(1.0, self.done/self.total) if self.total else 0.0
+
+    def describe(self) -> str:
+        return f'{self.label}: {self.unit} {self.done} of {self.total}' if self.total else f'{self.label}: {self.status}'
+
+_ids = itertools.count(1)
+_jobs = OrderedDict(); _lock = threading.Lock()
+_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='pca-job')
+
+def _run(job: Job, fn, args, kwargs) -> None:
+    if job._cancel.is_set(): job.status = 'cancelled'; job.finished = time.time(); return
+    job.status = 'running'
+    try:
+        with acting_for(job.subscribers): job.result = fn(*args, progress=job.progress, **kwargs)
+        job.status = 'done'
+    except Cancelled:
+        job.status = 'cancelled'
+    except Exception as e:
+        job.error = e; job.status = 'error'
+    finally:
+        job.finished = time.time()
+
+def submit(key, fn, *args, label: str = None, unit: str = 'step', **kwargs) -> Job:
+    """
+    Run fn in the background and return its Job. While a job with the same
+    `key` is queued or running (and not being cancelled) it is returned
+    instead of starting another.
+    """
+    with _lock:
+        for job in _jobs.values():
+            if job.key == key and job.active and not job._cancel.is_set(): return job
+        job = Job(key, label or str(key), unit); _jobs[job.id] = job
+        for old in [j for j in _jobs.values() if not j.active][:max(0, len(_jobs) - MAX_JOBS)]: del _jobs[old.id]
+        job.future = _pool.submit(_run, job, fn, args, kwargs)
+    return job
+
+def get(job_id: int):
+    with _lock: return _jobs.get(job_id)
+
+def cancel_all() -> None:
+    with _lock: active = [j for j in _jobs.values() if j.active]
+    for j in active: j.cancel()
+
+# ---------------------------
+# Streamlit
+# ---------------------------
+def track(job: Job) -> None:
+    """Subscribe this session to `job` and have it collect the result (see sidebar_panel)."""
+    import streamlit as st
+    job.subscribe(session_id())
+    ids = st.session_state.setdefault('_jobs', [])
+    if job.id not in ids: ids.append(job.id)
+
+def collect() -> list:
+    """
+    Publish this session's finished jobs into session state (its own
+    copy-on-write view of the result, see registry); returns the jobs
+    still active. Cancelled / failed jobs (and jobs this session detached
+    from) are noted by key (stopped(key)) so pages do not resubmit them on
+    their own.
+    """
+    import streamlit as st
+    active = []; ended = st.session_state.setdefault('_jobs_stopped', {}); sid = session_id()
+    for jid in st.session_state.get('_jobs', []):
+        job = get(jid)
+        if job is None: continue
+        if sid not in job.subscribers: ended[job.key] = 'cancelled'
+        elif job.status == 'done': st.session_state.update(_view(job.result)); ended.pop(job.key, None)
+        elif job.active: active.append(job)
+        else:
+            ended[job.key] = job.status
+            if job.status == 'error': st.session_state['_job_error'] = f'{job.label} failed: {job.error}'
+    st.session_state['_jobs'] = [j.id for j in active]
+    return active
+
+def stopped(key):
+    """'cancelled' / 'error' if this session's last job for `key` ended that way, else None."""
+    import streamlit as st
+    return st.session_state.get('_jobs_stopped', {}).get(key)
+
+def resume(key) -> None:
+    import streamlit as st
+    st.session_state.get('_jobs_stopped', {}).pop(key, None)
+
+def _progress(ids: list) -> None:
+    import streamlit as st
+    jobs = [j for j in map(get, ids) if j is not None]
+    if any(not j.active for j in jobs): st.rerun()
+    for j in jobs:
+        st.progress(j.fraction, text=j.describe())
+        if st.button('Cancel', key=f'_job_cancel_{j.id}'): j.cancel(session_id()); st.rerun()
+
+def progress_panel(jobs: list) -> None:
+    """Progress bars with Cancel buttons, refreshed every POLL_S; the page reruns when a job finishes."""
+    import streamlit as st
+    if jobs: st.fragment(_progress, run_every=POLL_S)([j.id for j in jobs])
+
+def sidebar_panel() -> None:
+    """Collect finished jobs into session state and show the active ones in the sidebar."""
+    import streamlit as st
+    active = collect()
+    err = st.session_state.pop('_job_error', None)
+    if err: st.sidebar.error(err)
+    if active:
+        with st.sidebar: st.caption('Background jobs'); progress_panel(active)
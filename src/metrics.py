@@ -1,20 +1,57 @@
 import numpy as np, pandas as pd
+from .instrument import traced
 
+def _growth_parts(r: np.ndarray):
+    """Split 1+r into log|1+r| and indicator arrays so products become sums: (log, zero, negative, nan)."""
+    g = 1.0 + r; nan = np.isnan(g); zero = g == 0; neg = g < 0
+    return np.log(np.where(nan | zero, 1.0, np.abs(g))), zero, neg, nan
+
+def _compose(lg, zero, neg):
+    """Rebuild a product of growth factors from summed parts (zero/neg are counts)."""
+    return np.where(zero > 0, 0.0, np.where(neg % 2 == 1, -1.0, 1.0)*np.exp(lg))
+
+@traced
+def rolling_compound(r, window: int):
+    """
+    Rolling product of (1+r) over `window` rows in O(n), for a Series, DataFrame
+    or (T, ...) array (all columns at once). Uses prefix sums of log|1+r| plus
+    counts of -100% and below--100% returns, so zeros and sign flips are exact.
+    NaN where the window is incomplete or holds a NaN, like
+    rolling(window).apply(np.prod).
+    """
+    a = np.asarray(r, dtype=float); out = np.full(a.shape, np.nan)
+    if 0 < window <= len(a):
+        parts = _growth_parts(a)
+        cs = [np.concatenate([np.zeros((1,)+a.shape[1:]), np.cumsum(p, axis=0)]) for p in parts]
+        lg, zero, neg, nan = (c[window:] - c[:-window] for c in cs)
+        out[window-1:] = np.where(nan > 0, np.nan, _compose(lg, np.rint(zero), np.rint(neg)))
+    if isinstance(r, pd.DataFrame): return pd.DataFrame(out, index=r.index, columns=r.columns)
+    if isinstance(r, pd.Series): return pd.Series(out, index=r.index, name=r.name)
+    return out
+
+@traced
 def calendar_returns(strat: pd.Series, bench: pd.Series) -> pd.DataFrame:
-    df = pd.DataFrame({'Strategy':strat,'EMBI GD':bench}).dropna().sort_index(); df['Year']=df.index.year
-    return df.groupby('Year').apply(lambda x: (1+x[['Strategy','EMBI GD']]).prod()-1)
+    df = pd.DataFrame({'Strategy':strat,'EMBI GD':bench}).dropna().sort_index()
+    lg, zero, neg, _ = _growth_parts(df.to_numpy(dtype=float))
+    parts = pd.DataFrame(np.hstack([lg, zero, neg]), index=df.index).groupby(df.index.year.rename('Year')).sum().to_numpy()
+    k = df.shape[1]
+    return pd.DataFrame(_compose(parts[:, :k], parts[:, k:2*k], parts[:, 2*k:]) - 1,
+                        index=pd.Index(np.unique(df.index.year), name='Year'), columns=df.columns)
 
+@traced
 def rolling_excess(strat, bench, window=12):
-    rs=(1+strat).rolling(window).apply(np.prod, raw=False); rb=(1+bench).rolling(window).apply(np.prod, raw=False)
-    return (rs/rb)-1
+    g = rolling_compound(pd.concat([strat, bench], axis=1), window)
+    return g.iloc[:, 0]/g.iloc[:, 1] - 1
 
+@traced
 def cumulative_excess(strat, bench):
     cs=(1+strat).cumprod(); cb=(1+bench).cumprod(); return (cs/cb)-1
 
+@traced
 def rolling_te_ir(strat, bench, window=12):
     df=pd.DataFrame({'Strategy':strat,'EMBI GD':bench}).dropna().sort_index(); act=df['Strategy']-df['EMBI GD']
     te_roll=act.rolling(window).std()*np.sqrt(12); te_over=act.std()*np.sqrt(12)
-    roll_active=(1+act).rolling(window).apply(np.prod, raw=False)-1; ir_roll=roll_active/te_roll
+    roll_active=rolling_compound(act, window)-1; ir_roll=roll_active/te_roll
     ann_s=df['Strategy'].mean()*12; ann_b=df['EMBI GD'].mean()*12
     ir_over=(ann_s-ann_b)/te_over if te_over else float('nan')
     return te_roll, te_over, ir_roll, ir_over, ann_s, ann_b
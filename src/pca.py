@@ -1,63 +1,351 @@
 import numpy as np, pandas as pd
-from sklearn.decomposition import PCA
+from .instrument import traced
 
 EQUITY_CANDIDATES = ['MSCI World','SPX Index','SXXP Index','MXEF Index','HSI Index','TPX Index']
 YIELD_CANDIDATES  = ['USGG10Y Index','USGG10YR Index','USGG10','US10Y','GUKG10 Index','GTDEM10Y Govt']
 
+# Settings used by the app and the batch runner (also part of the result cache key)
+DEFAULT_CONFIG = {'k': 2, 'orient': 'corr', 'solver': 'auto', 'window': None, 'missing': 'drop'}
+
+# Eigensolvers for the expanding fits. 'eigh' is exact (full decomposition per
+# step, O(N^3)); the others only find the top-k subspace and stop once every
+# component satisfies ||C v - w v|| <= SOLVER_TOL * w_1. Against 'eigh' that
+# bounds loading errors by about SOLVER_TOL * w_1 / (eigen gap): ~1e-8 on
+# loadings, ~1e-6 on scores and ~1e-14 on EVR on typical factor sets. Steps
+# that do not converge (no gap) are solved exactly, so the bound always holds.
+# 'auto' = 'eigh' up to EXACT_MAX_N columns, warm-started 'power' above.
+SOLVERS = ('auto', 'eigh', 'arpack', 'randomized', 'power')
+SOLVER_TOL = 1e-8
+EXACT_MAX_N = 256
+OVERSAMPLE = 4
+PROGRESS_STEPS = 50     # blocks per fit when a progress callback is given
+
 def _anchor(Z, cands):
     for c in cands:
         if c in Z.columns: return c
     return Z.columns[0]
 
-def expanding_pca_2(Z: pd.DataFrame):
-    eq = _anchor(Z, EQUITY_CANDIDATES); yld = _anchor(Z, YIELD_CANDIDATES)
-    pc1, pc2, ev1, ev2 = [], [], [], []
-    load_last = None
-    for t in range(1, len(Z)):
-        Zi = Z.iloc[:t+1,:]
-        if len(Zi)<2: pc1.append(np.nan); pc2.append(np.nan); ev1.append(np.nan); ev2.append(np.nan); continue
-        p = PCA(n_components=2).fit(Zi.values)
-        scores = p.transform(Zi.values)
-        s_t = scores[-1,:].copy(); hist = pd.DataFrame(scores, index=Zi.index, columns=['PC1','PC2'])
-        try:
-            if hist['PC1'].corr(Zi[eq])<0: hist['PC1']*=-1; s_t[0]*=-1
-        except Exception: pass
-        try:
-            if hist['PC2'].corr(-Zi[yld])<0: hist['PC2']*=-1; s_t[1]*=-1
-        except Exception: pass
-        pc1.append(s_t[0]); pc2.append(s_t[1]); ev1.append(p.explained_variance_ratio_[0]); ev2.append(p.explained_variance_ratio_[1])
-        if t==len(Z)-1:
-            comps = p.components_.copy()
-            if hist['PC1'].corr(Zi[eq])<0: comps[0,:]*=-1
-            if hist['PC2'].corr(-Zi[yld])<0: comps[1,:]*=-1
-            load_last = pd.DataFrame(comps.T, index=Z.columns, columns=['PC1','PC2'])
-    PC = pd.DataFrame({'PC1':[np.nan]*(len(Z)-len(pc1))+pc1, 'PC2':[np.nan]*(len(Z)-len(pc2))+pc2}, index=Z.index)
-    EVR = pd.DataFrame({'PC1_EVR':[np.nan]*(len(Z)-len(ev1))+ev1, 'PC2_EVR':[np.nan]*(len(Z)-len(ev2))+ev2}, index=Z.index)
+def _expanding_moments(X: np.ndarray, chunk: int = 0, state: dict = None):
+    """
+    Running mean / covariance of an expanding window, one step per row.
+    Yields (t0, n, mu, cov) for consecutive blocks of rows, where cov[i] is the
+    ddof=1 covariance of X[:t0+i+1]. Sums are kept around the first row so the
+    cross-products stay well conditioned, and a block is one cumsum of outer
+    products instead of a refit per month.
+    `state` ({'n', 'c', 's', 'S'}: row count, shift, running sums) continues an
+    earlier window and is updated in place, so rows can be appended later.
+    """
+    T, N = X.shape
+    state = {'n': 0} if state is None else state
+    if T == 0: return
+    if not state['n']: state.update(c=X[0].copy(), s=np.zeros(N), S=np.zeros((N, N)))
+    chunk = max(1, min(chunk or T, T, (8 << 20) // max(1, N*N)))
+    n0, c, s, S = state['n'], state['c'], state['s'], state['S']
+    for t0 in range(0, T, chunk):
+        D = X[t0:t0+chunk] - c
+        sc = s + np.cumsum(D, axis=0); Sc = S + np.cumsum(D[:,:,None]*D[:,None,:], axis=0)
+        s, S = sc[-1], Sc[-1]
+        n = np.arange(n0+t0+1, n0+t0+len(D)+1, dtype=float)
+        m = sc/n[:,None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = (Sc - n[:,None,None]*m[:,:,None]*m[:,None,:])/(n-1)[:,None,None]
+        state.update(n=int(n[-1]), s=s, S=S)
+        yield t0, n, m + c, cov
+
+def _rolling_moments(X: np.ndarray, chunk: int = 0, state: dict = None):
+    """
+    _expanding_moments for a fixed lookback of state['window'] rows: each step
+    adds the new row's outer product and removes the one leaving the window
+    (rank-one update and downdate, O(N^2) per step). Yields (t0, n, mu, cov)
+    with n the rows in the window. Sums are rebuilt from the window rows at
+    the start of every block, so add/remove rounding never accumulates past
+    one block. state keeps the last `window` rows ('buf') for appends.
+    """
+    T, N = X.shape; W = state['window']
+    if T == 0: return
+    if not state['n']: state.update(c=X[0].copy(), buf=np.empty((0, N)))
+    chunk = max(1, min(chunk or T, T, (8 << 20) // max(1, N*N)))
+    c = state['c']
+    for t0 in range(0, T, chunk):
+        n0, hist = state['n'], state['buf']; h = len(hist)
+        A = np.concatenate([hist, X[t0:t0+chunk]]) - c; add = A[h:]; L = len(add)
+        out = np.arange(h, h+L) - W
+        rem = np.where((out >= 0)[:, None], A[np.clip(out, 0, None)], 0.0)
+        s = A[:h].sum(axis=0); S = A[:h].T @ A[:h]
+        sc = s + np.cumsum(add - rem, axis=0)
+        Sc = S + np.cumsum(add[:,:,None]*add[:,None,:] - rem[:,:,None]*rem[:,None,:], axis=0)
+        n = np.minimum(np.arange(n0+1, n0+L+1), W).astype(float)
+        m = sc/n[:,None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = (Sc - n[:,None,None]*m[:,:,None]*m[:,None,:])/(n-1)[:,None,None]
+        state.update(n=n0+L, buf=(A[-W:] + c))
+        yield t0, n, m + c, cov
+
+def _masked_moments(X: np.ndarray, chunk: int = 0, state: dict = None):
+    """
+    Expanding pairwise moments of a ragged panel (NaN = not observed): per
+    factor pair the overlap count, sums and cross-products are accumulated
+    from zero-filled values and observation masks, so no row is dropped and
+    nothing is copied per step. cov[i, j] is the ddof=1 covariance over the
+    rows where both i and j are observed; factors with fewer than
+    state['min_periods'] observations are inactive (zero rows / columns,
+    act False). Yields (t0, n, mu, cov, act) with n the rows seen so far.
+    """
+    T, N = X.shape; minp = max(2, state.get('min_periods') or 2)
+    if T == 0: return
+    if not state['n']:
+        # shift: first observed value per factor (0 for factors not seen yet)
+        c = np.nan_to_num(X[(~np.isnan(X)).argmax(axis=0), np.arange(N)])
+        state.update(c=c, C=np.zeros((N, N)), s=np.zeros((N, N)), S=np.zeros((N, N)))
+    chunk = max(1, min(chunk or T, T, (8 << 20) // max(1, 3*N*N)))
+    n0, c, C, s, S = state['n'], state['c'], state['C'], state['s'], state['S']
+    for t0 in range(0, T, chunk):
+        M = ~np.isnan(X[t0:t0+chunk]); D = np.where(M, X[t0:t0+chunk] - c, 0.0); Mf = M.astype(float)
+        Cc = C + np.cumsum(Mf[:,:,None]*Mf[:,None,:], axis=0)           # overlap counts
+        sc = s + np.cumsum(D[:,:,None]*Mf[:,None,:], axis=0)            # sc[i, j]: sum of x_i where j observed too
+        Sc = S + np.cumsum(D[:,:,None]*D[:,None,:], axis=0)
+        C, s, S = Cc[-1], sc[-1], Sc[-1]
+        d = np.arange(N); nd = Cc[:, d, d]
+        act = nd >= minp; both = act[:,:,None] & act[:,None,:] & (Cc >= 2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            m = np.where(nd > 0, sc[:, d, d]/nd, 0.0)
+            cov = np.where(both, (Sc - sc*np.swapaxes(sc, 1, 2)/Cc)/(Cc - 1), 0.0)
+        n = np.arange(n0+t0+1, n0+t0+len(D)+1, dtype=float)
+        state.update(n=int(n[-1]), C=C, s=s, S=S)
+        yield t0, n, m + c, cov, act
+
+def _signed(V: np.ndarray) -> np.ndarray:
+    """sklearn's svd_flip convention: largest |loading| of each vector > 0."""
+    big = np.take_along_axis(V, np.abs(V).argmax(axis=-2)[..., None, :], axis=-2)
+    return V*np.where(big < 0, -1.0, 1.0)
+
+def _ritz(cov: np.ndarray, Q: np.ndarray):
+    """Rayleigh-Ritz on the orthonormal basis Q: Ritz values (desc), vectors and relative residuals."""
+    CQ = cov @ Q
+    w, U = np.linalg.eigh(np.swapaxes(Q, -1, -2) @ CQ)
+    w, U = w[..., ::-1], U[..., ::-1]
+    V = Q @ U; R = CQ @ U - V*w[..., None, :]
+    scale = np.abs(w[..., :1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        res = np.where(scale > 0, np.linalg.norm(R, axis=-2)/scale, 0.0)
+    return w, V, res
+
+def _exact(cov: np.ndarray, k: int):
+    w, V = np.linalg.eigh(cov)
+    return w[..., ::-1][..., :k], V[..., ::-1][..., :k]
+
+def _randomized(cov: np.ndarray, k: int, tol: float, seed: int = 0, max_iter: int = 30):
+    """
+    Batched randomized subspace iteration from a fixed-seed Gaussian start.
+    Steps still above `tol` after max_iter (no eigen gap) are solved exactly.
+    """
+    N = cov.shape[-1]; l = min(N, k + OVERSAMPLE)
+    Q = np.linalg.qr(cov @ np.random.default_rng(seed).standard_normal((N, l)))[0]
+    for _ in range(max_iter):
+        w, V, res = _ritz(cov, Q)
+        if (res[..., :k] <= tol).all(): break
+        Q = np.linalg.qr(cov @ Q)[0]
+    w, V = w[..., :k], V[..., :k]
+    bad = (res[..., :k] > tol).any(axis=-1)
+    if bad.any(): w[bad], V[bad] = _exact(cov[bad], k)
+    return w, V
+
+def _warm(cov: np.ndarray, k: int, tol: float, state: dict, solver: str, max_iter: int = 30):
+    """
+    Step-by-step solve reusing the previous step's subspace (kept in state['Q']):
+    block power iteration ('power') or ARPACK Lanczos seeded with the previous
+    leading vector ('arpack'). Loadings drift slowly, so a step typically
+    converges in a few iterations; a step that does not (no eigen gap) is
+    solved exactly.
+    """
+    T, N, _ = cov.shape; l = min(N, k + OVERSAMPLE)
+    Q = state.get('Q')
+    if Q is None or Q.shape != (N, l): Q = np.linalg.qr(np.random.default_rng(0).standard_normal((N, l)))[0]
+    w, V = np.empty((T, k)), np.empty((T, N, k))
+    if solver == 'arpack':
+        from scipy.sparse.linalg import eigsh, ArpackNoConvergence
+    for t in range(T):
+        C = cov[t]
+        if solver == 'arpack':
+            try:
+                wt, Vt = eigsh(C, k=k, which='LA', v0=Q[:, 0], tol=tol)
+                o = np.argsort(wt)[::-1]; w[t], V[t] = wt[o], Vt[:, o]
+                Q = np.linalg.qr(np.concatenate([V[t], Q[:, k:]], axis=1))[0]; continue
+            except ArpackNoConvergence:
+                pass  # fall through to power iteration / exact
+        for _ in range(max_iter):
+            wt, Q, res = _ritz(C, Q)
+            if (res[:k] <= tol).all(): break
+            Q = np.linalg.qr(C @ Q)[0]
+        else:
+            wt, Q = _exact(C, Q.shape[1])
+        w[t], V[t] = wt[:k], Q[:, :k]
+    state['Q'] = Q
+    return w, V
+
+def _top_k(cov: np.ndarray, k: int, solver: str = 'eigh', tol: float = SOLVER_TOL, state: dict = None):
+    """
+    Top-k eigenvalues (desc), vectors (.., N, k) and trace of stacked
+    covariances with the chosen solver (see SOLVERS). Vector signs follow
+    sklearn's svd_flip (largest |loading| > 0).
+    """
+    N = cov.shape[-1]
+    if solver == 'auto': solver = 'eigh' if N <= EXACT_MAX_N else 'power'
+    if solver not in SOLVERS: raise ValueError(f"Unknown solver {solver!r}; use one of {SOLVERS}.")
+    if solver == 'eigh' or N <= k + OVERSAMPLE: w, V = _exact(cov, k)
+    elif solver == 'randomized': w, V = _randomized(cov, k, tol)
+    else: w, V = _warm(cov, k, tol, {} if state is None else state, solver)
+    return w, _signed(V), np.trace(cov, axis1=-2, axis2=-1)
+
+@traced
+def orient_flips(cov: np.ndarray, V: np.ndarray, ie: int, iy: int, mode: str = 'corr') -> np.ndarray:
+    """
+    Orientation flags for stacked components V (T, N, k): PC1 should co-move
+    with anchor column `ie` (equity), PC2 with the inverted anchor `iy` (yield).
+    mode='corr'    sign of the cross-moment cov(score_k, anchor) = (C v_k)[anchor],
+                   which is the sign of the history correlation, read off the
+                   running covariance instead of materialising the score history.
+    mode='loading' sign of the anchor's own loading; identical whenever the
+                   eigenvalue is > 0 and needs no covariance at all.
+    Returns a (T, k) bool array, True where the component must be flipped.
+    """
+    k = V.shape[-1]; a = np.array([ie, iy][:k]); j = np.arange(len(a))
+    if mode == 'corr': m = np.einsum('tjn,tnj->tj', cov[:, a, :], V[:, :, j])
+    elif mode == 'loading': m = V[:, a, j]
+    else: raise ValueError(f"Unknown orientation mode {mode!r}; use 'corr' or 'loading'.")
+    flip = np.zeros(V.shape[::2], bool)
+    flip[:, j] = m*np.array([1.0, -1.0][:k]) < 0
+    return flip
+
+def row_hashes(Z: pd.DataFrame) -> np.ndarray:
+    """uint64 hash per row of Z (date + values); equal hashes = unchanged history."""
+    idx = Z.index.as_unit('ns') if isinstance(Z.index, pd.DatetimeIndex) else Z.index
+    return pd.util.hash_pandas_object(Z.set_axis(idx), index=True).to_numpy()
+
+def _settings(window: int = None, min_periods: int = None, missing: str = 'drop') -> dict:
+    """Fit settings kept in the moments state (pca_append only continues a state built with the same ones)."""
+    if window is not None and window < 2: raise ValueError(f'window must be at least 2 rows, got {window}.')
+    if missing not in ('drop', 'pairwise'): raise ValueError(f"Unknown missing mode {missing!r}; use 'drop' or 'pairwise'.")
+    if window and missing == 'pairwise': raise ValueError("missing='pairwise' is only available for the expanding window.")
+    return {'window': window, 'min_periods': (min_periods or window) if window else min_periods, 'missing': missing}
+
+def _fit(X: np.ndarray, ie: int, iy: int, k: int, orient: str, state: dict, solver: str, tol: float, progress=None) -> dict:
+    """
+    Expanding (or rolling, state['window']) fits for the rows of X, continuing
+    the moments in `state`. Complete rows only, unless state['missing'] is
+    'pairwise': then every row with an observation is fitted and missing or
+    inactive entries score as their mean (centred value 0).
+    progress(rows_done, T) is called after each block (PROGRESS_STEPS blocks).
+    """
+    T, N = X.shape
+    pairwise = state.get('missing') == 'pairwise'
+    pos = np.flatnonzero(~np.isnan(X).all(axis=1) if pairwise else ~np.isnan(X).any(axis=1)); Xc = X[pos]
+    out = {'scores': np.full((T, k), np.nan), 'evr': np.full((T, k), np.nan),
+           'loadings': np.full((T, N, k), np.nan), 'flips': np.zeros((T, k), bool), 'valid': np.zeros(T, bool)}
+    moments = _masked_moments if pairwise else _rolling_moments if state.get('window') else _expanding_moments
+    chunk = -(-len(Xc) // PROGRESS_STEPS) if progress else 0
+    for t0, n, mu, cov, *act in moments(Xc, chunk=chunk, state=state):
+        if progress: progress(pos[t0+len(n)-1] + 1, T)
+        ok = act[0].sum(axis=1) >= max(2, k) if pairwise else n >= max(2, state.get('min_periods') or 2)
+        if not ok.any(): continue
+        j = np.arange(t0, t0+len(n))[ok]; rows = pos[j]; cov = cov[ok]
+        w, V, tr = _top_k(cov, k, solver, tol, state)
+        flip = orient_flips(cov, V, ie, iy, orient)
+        V = V*np.where(flip, -1.0, 1.0)[:,None,:]
+        D = Xc[j]-mu[ok]
+        if pairwise: D = np.where(act[0][ok] & ~np.isnan(D), D, 0.0)
+        out['scores'][rows] = np.einsum('tn,tnk->tk', D, V)
+        with np.errstate(divide='ignore', invalid='ignore'): out['evr'][rows] = w/tr[:,None]
+        out['loadings'][rows] = V; out['flips'][rows] = flip; out['valid'][rows] = True
+    if progress: progress(T, T)
+    return out
+
+@traced
+def pca_timeline(Z: pd.DataFrame, k: int = 2, orient: str = 'corr', solver: str = 'auto', tol: float = SOLVER_TOL,
+                 window: int = None, min_periods: int = None, missing: str = 'drop', progress=None) -> dict:
+    """
+    Single-pass expanding PCA over the complete rows of Z; with `window`, a
+    rolling PCA on the last `window` complete rows instead (fits start once
+    `min_periods` rows, default `window`, are available).
+    missing='pairwise' fits ragged panels (late-starting or gappy factors)
+    without dropping rows: covariances are taken over the rows where each
+    pair is observed, a factor joins once it has `min_periods` (default 2)
+    observations, and a row's missing entries score as the factor mean.
+    `progress(t, T)` is called as the fit advances (month t of T); it may
+    raise to abandon the fit (jobs.Cancelled).
+
+    Returns a dict of NumPy arrays aligned to Z.index / Z.columns:
+      'scores' (T, k), 'evr' (T, k), 'loadings' (T, N, k) sign-oriented,
+      'flips' (T, k) True where orientation flipped the solver's sign,
+      'valid' (T,) True where a fit exists (complete row, >= 2 rows so far;
+              pairwise: any observation, >= max(2, k) active factors),
+      'row_hash' (T,) and 'state' (running moments) for pca_append.
+    PC1 is oriented to co-move with the equity anchor and PC2 against the
+    yield anchor (see orient_flips for `orient`). `solver` / `tol` pick the
+    eigensolver (see SOLVERS). With missing='drop' rows with any NaN are
+    skipped (as dropna(how='any')).
+    """
+    k = min(k, Z.shape[1])
+    ie = Z.columns.get_loc(_anchor(Z, EQUITY_CANDIDATES)); iy = Z.columns.get_loc(_anchor(Z, YIELD_CANDIDATES))
+    state = {'n': 0, **_settings(window, min_periods, missing)}
+    out = _fit(Z.to_numpy(dtype=float), ie, iy, k, orient, state, solver, tol, progress)
+    return {'index': Z.index, 'columns': Z.columns, **out, 'row_hash': row_hashes(Z), 'state': state}
+
+@traced
+def pca_append(res: dict, Z: pd.DataFrame, k: int = 2, orient: str = 'corr', solver: str = 'auto', tol: float = SOLVER_TOL,
+               window: int = None, min_periods: int = None, missing: str = 'drop', progress=None):
+    """
+    Extend a pca_timeline result to Z when Z is the same history plus new rows
+    (same columns, identical row hashes over the cached dates). Only the new
+    expanding steps are fitted; earlier rows are reused as they are. Matches a
+    full pca_timeline(Z, k, orient, solver, tol, window, ...) to float rounding (~1e-12;
+    iterative solvers to within their tolerance). Settings must be the ones
+    `res` was built with. Returns None when Z does not extend `res` (edited
+    history, other columns, or a result cached without its moments state);
+    the caller then runs the full fit.
+    """
+    if 'state' not in res or not Z.columns.equals(pd.Index(res['columns'])): return None
+    if any(res['state'].get(n) != v for n, v in _settings(window, min_periods, missing).items()): return None
+    T0 = len(res['index']); h = row_hashes(Z)
+    if len(Z) < T0 or not np.array_equal(h[:T0], res['row_hash']): return None
+    if len(Z) == T0: return res
+    k = min(k, Z.shape[1])
+    if res['scores'].shape[1] != k: return None
+    ie = Z.columns.get_loc(_anchor(Z, EQUITY_CANDIDATES)); iy = Z.columns.get_loc(_anchor(Z, YIELD_CANDIDATES))
+    state = {n: (np.array(v) if isinstance(v, np.ndarray) else v) for n, v in res['state'].items()}
+    tick = (lambda t, n: progress(T0 + t, T0 + n)) if progress else None
+    new = _fit(Z.iloc[T0:].to_numpy(dtype=float), ie, iy, k, orient, state, solver, tol, tick)
+    return {'index': Z.index, 'columns': Z.columns, **{n: np.concatenate([res[n], v]) for n, v in new.items()},
+            'row_hash': h, 'state': state}
+
+@traced
+def loadings_frame(res: dict, date):
+    """Oriented loadings at `date` as an (N x k) DataFrame, or None if no fit exists there."""
+    i = res['index'].get_loc(date)
+    if not res['valid'][i]: return None
+    return pd.DataFrame(res['loadings'][i], index=res['columns'], columns=[f'PC{j+1}' for j in range(res['loadings'].shape[2])])
+
+@traced
+def pca_frames(res: dict):
+    """(PC, EVR, latest loadings) frames in the expanding_pca_2 output contract."""
+    PC = pd.DataFrame(res['scores'][:, :2], index=res['index'], columns=['PC1','PC2'])
+    EVR = pd.DataFrame(res['evr'][:, :2], index=res['index'], columns=['PC1_EVR','PC2_EVR'])
     EVR['EVR_1_2_sum'] = EVR[['PC1_EVR','PC2_EVR']].sum(axis=1)
     PC['PC1_SMA5'] = PC['PC1'].rolling(5, min_periods=5).mean(); PC['PC2_SMA5'] = PC['PC2'].rolling(5, min_periods=5).mean()
     PC['dPC2'] = PC['PC2'].diff()
-    return PC, EVR, (load_last if load_last is not None else pd.DataFrame(index=Z.columns, columns=['PC1','PC2']))
-
-def expanding_loadings_timeline(Z: pd.DataFrame):
-    eq = _anchor(Z, EQUITY_CANDIDATES); yld = _anchor(Z, YIELD_CANDIDATES)
-    tl = {}
-    for t in range(len(Z)):
-        Zi = Z.iloc[:t+1,:].dropna(how='any')
-        if len(Zi)<2: continue
-        p = PCA(n_components=min(2, Zi.shape[1])).fit(Zi.values)
-        scores = p.transform(Zi.values)
-        hist = pd.DataFrame(scores, index=Zi.index, columns=[f'PC{i+1}' for i in range(p.n_components_)])
-        flip1=flip2=1
-        try:
-            if 'PC1' in hist and hist['PC1'].corr(Zi[eq])<0: hist['PC1']*=-1; flip1=-1
-        except Exception: pass
-        try:
-            if p.n_components_>=2 and hist['PC2'].corr(-Zi[yld])<0: hist['PC2']*=-1; flip2=-1
-        except Exception: pass
-        comps = p.components_.copy()
-        if p.n_components_>=1: comps[0,:]*=flip1
-        if p.n_components_>=2: comps[1,:]*=flip2
-        L = pd.DataFrame(comps.T, index=Zi.columns, columns=[f'PC{i+1}' for i in range(p.n_components_)])
-        L = L.reindex(Z.columns).fillna(0.0)
-        tl[Zi.index[-1]] = L
-    return tl
+    load_last = loadings_frame(res, res['index'][-1]) if len(res['index']) else None
+    return PC, EVR, (load_last if load_last is not None else pd.DataFrame(index=res['columns'], columns=['PC1','PC2']))
+
+@traced
+def expanding_pca_2(Z: pd.DataFrame, orient: str = 'corr', solver: str = 'auto'):
+    return pca_frames(pca_timeline(Z, k=2, orient=orient, solver=solver))
+
+@traced
+def rolling_pca_2(Z: pd.DataFrame, window: int = 120, orient: str = 'corr', solver: str = 'auto', min_periods: int = None):
+    """Fixed-lookback counterpart of expanding_pca_2 (same PC / EVR / loadings frames)."""
+    return pca_frames(pca_timeline(Z, k=2, orient=orient, solver=solver, window=window, min_periods=min_periods))
+
+@traced
+def expanding_loadings_timeline(Z: pd.DataFrame, orient: str = 'corr', solver: str = 'auto'):
+    res = pca_timeline(Z, k=2, orient=orient, solver=solver)
+    return {d: loadings_frame(res, d) for d in res['index'][res['valid']]}
@@ -0,0 +1,48 @@
+# pipeline.py
+"""
+Cached expanding PCA + regimes shared by the PCA page and the batch runner.
+
+A workbook seen before is a cache hit. A workbook that only appends months to
+one seen before (same factors, same history, e.g. this month's file vs last
+month's) reuses the cached timeline and fits just the new rows. Anything else
+runs the full expanding PCA.
+"""
+from . import pca as pca_mod, regimes as regimes_mod, cache as disk_cache
+from .utils import bytes_hash
+
+def _head_key(Z, minp_z, cfg_hash: str) -> str:
+    # one "latest timeline" pointer per factor set / settings
+    return disk_cache.entry_key('pca-head', bytes_hash('\x1f'.join(map(str, Z.columns)).encode('utf-8')), minp_z, cfg_hash)
+
+def pca_and_regime(Z, file_key: str = None, minp_z=None, cfg: dict = None, use_cache: bool = True, progress=None):
+    """
+    Returns (pca_tl, PC, EVR, loadings_latest, regime, how) with how in
+    'cached' (same workbook), 'append' (new rows only) or 'full'.
+    Without `file_key` (or with use_cache=False) nothing is read or written.
+    `progress(t, T)` follows the fit (see pca.pca_timeline).
+    """
+    cfg = dict(pca_mod.DEFAULT_CONFIG if cfg is None else cfg)
+    use_cache = use_cache and bool(file_key)
+    chash = disk_cache.config_hash(cfg)
+    key = disk_cache.entry_key('pca', file_key, minp_z, chash)
+    hit = disk_cache.load(key) if use_cache else None
+    if hit is not None:
+        pca_tl = hit['pca_tl']; PC, EVR, loadings = pca_mod.pca_frames(pca_tl)
+        return pca_tl, PC, EVR, loadings, hit['regime'], 'cached'
+
+    prev = None
+    if use_cache:
+        head = disk_cache.load(_head_key(Z, minp_z, chash))
+        prev = disk_cache.load(head['key']) if head is not None else None
+    pca_tl = pca_mod.pca_append(prev['pca_tl'], Z, **cfg, progress=progress) if prev is not None else None
+    if pca_tl is not None:
+        PC, EVR, loadings = pca_mod.pca_frames(pca_tl)
+        regime = regimes_mod.extend_regime(prev['regime'], PC); how = 'append'
+    else:
+        pca_tl = pca_mod.pca_timeline(Z, **cfg, progress=progress)
+        PC, EVR, loadings = pca_mod.pca_frames(pca_tl)
+        regime = regimes_mod.compute_regime(PC); how = 'full'
+    if use_cache:
+        disk_cache.store(key, {'pca_tl': pca_tl, 'regime': regime})
+        disk_cache.store(_head_key(Z, minp_z, chash), {'key': key, 'rows': len(Z)})
+    return pca_tl, PC, EVR, loadings, regime, how
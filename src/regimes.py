@@ -1,26 +1,71 @@
 import numpy as np, pandas as pd
+from matplotlib.collections import PolyCollection
 from .utils import REGIME_COLORS, RISK_COLORS
+from .instrument import traced
 
+# Shared category table: regime codes are int8 indices into REGIMES, -1 = undefined
+REGIMES = ['Goldilocks', 'Reflation', 'Recession', 'Stagflation']
+RISK_ON_CODES = np.array([0, 1], dtype=np.int8)
+
+@traced
+def regime_codes_from_sma(sma1, sma2) -> np.ndarray:
+    """int8 regime codes from PC1/PC2 SMA values (any array shape): sign(PC1) = risk, PC2 > 0 = duration bid."""
+    s1 = np.asarray(sma1, dtype=float); s2 = np.asarray(sma2, dtype=float)
+    undefined = np.isnan(s2) | ~((s1 > 0) | (s1 < 0))
+    return np.select([undefined, (s1 > 0) & (s2 > 0), s1 > 0, s2 > 0], [-1, 0, 1, 2], 3).astype(np.int8)
+
+@traced
+def regime_codes(regime: pd.Series) -> np.ndarray:
+    """int8 codes of a regime label Series (categorical or plain labels); unknown/NaN -> -1."""
+    if isinstance(regime.dtype, pd.CategoricalDtype) and list(regime.cat.categories) == REGIMES:
+        return regime.cat.codes.to_numpy(dtype=np.int8)
+    return pd.Categorical(regime, categories=REGIMES).codes.astype(np.int8)
+
+@traced
+def risk_on_mask(regime: pd.Series) -> np.ndarray:
+    """Boolean Risk-ON mask (Goldilocks/Reflation) of a regime label Series."""
+    return np.isin(regime_codes(regime), RISK_ON_CODES)
+
+@traced
 def compute_regime(PC: pd.DataFrame) -> pd.Series:
-    risk = pd.Series(np.nan, index=PC.index, dtype='object')
-    risk[PC['PC1_SMA5']>0] = 'Risk-ON'; risk[PC['PC1_SMA5']<0] = 'Risk-OFF'
-    dis = PC['PC2_SMA5']>0
-    lab=[]
-    for ts in PC.index:
-        ro = risk.loc[ts]; s2 = dis.loc[ts] if pd.notna(PC.loc[ts,'PC2_SMA5']) else np.nan
-        if pd.isna(ro) or pd.isna(s2): lab.append(np.nan)
-        elif ro=='Risk-ON' and s2: lab.append('Goldilocks')
-        elif ro=='Risk-ON' and not s2: lab.append('Reflation')
-        elif ro=='Risk-OFF' and s2: lab.append('Recession')
-        else: lab.append('Stagflation')
-    return pd.Series(lab, index=PC.index, name='Regime')
+    codes = regime_codes_from_sma(PC['PC1_SMA5'], PC['PC2_SMA5'])
+    return pd.Series(pd.Categorical.from_codes(codes, categories=REGIMES), index=PC.index, name='Regime')
+
+@traced
+def extend_regime(regime: pd.Series, PC: pd.DataFrame) -> pd.Series:
+    """compute_regime for the rows of PC past the end of `regime`, appended to it (PC must extend regime's dates)."""
+    tail = compute_regime(PC.iloc[len(regime):])
+    return pd.concat([regime.astype(tail.dtype), tail]) if len(tail) else regime
+
+def _band_edges(idx: pd.DatetimeIndex):
+    """Left/right edge of each observation's band: calendar month for monthly data, else up to the next timestamp."""
+    step = np.median(np.diff(idx.as_unit('ns').asi8)) if len(idx) > 1 else 0
+    if len(idx) < 2 or 27 <= step/86_400e9 <= 32:
+        p = idx.to_period('M'); return p.start_time, (p + 1).start_time
+    return idx, idx[1:].append(pd.DatetimeIndex([idx[-1] + pd.Timedelta(int(step), 'ns')]))
 
+@traced
 def shade_regime_bands(ax, regime: pd.Series, alpha=0.28):
-    reg = regime.dropna();
+    """
+    Shade contiguous runs of equal regime labels on `ax` (full axes height).
+    Run boundaries come from np.diff of the label codes and each regime is one
+    PolyCollection, so a choppy daily history is a handful of artists rather
+    than one axvspan per run. Unknown labels are drawn light grey.
+    """
+    reg = regime.dropna()
     if reg.empty: return
-    p = reg.index.to_period('M')
-    start = p.asfreq('D','start').to_timestamp(); end = (p+1).asfreq('D','start').to_timestamp()
-    blocks=(reg!=reg.shift()).cumsum()
-    for _, idx in reg.groupby(blocks).groups.items():
-        idx=list(idx); lab=reg.loc[idx[0]]
-        ax.axvspan(start.loc[idx[0]], end.loc[idx[-1]], color=REGIME_COLORS.get(lab,'#eee'), alpha=alpha, lw=0)
+    if not isinstance(reg.index, pd.DatetimeIndex): reg.index = pd.to_datetime(reg.index)
+    codes, labels = pd.factorize(reg)
+    cut = np.flatnonzero(np.diff(codes)) + 1
+    first, last = np.r_[0, cut], np.r_[cut, len(codes)] - 1
+    left, right = _band_edges(reg.index)
+    ax.xaxis.update_units(left)
+    x0 = np.asarray(ax.convert_xunits(left[first]), dtype=float); x1 = np.asarray(ax.convert_xunits(right[last]), dtype=float)
+    run = codes[first]
+    for c, lab in enumerate(labels):
+        m = run == c
+        verts = np.stack([np.c_[x0[m], np.zeros(m.sum())], np.c_[x0[m], np.ones(m.sum())],
+                          np.c_[x1[m], np.ones(m.sum())], np.c_[x1[m], np.zeros(m.sum())]], axis=1)
+        ax.add_collection(PolyCollection(verts, facecolors=REGIME_COLORS.get(lab, '#eee'), alpha=alpha, lw=0,
+                                         transform=ax.get_xaxis_transform(), label='_nolegend_'), autolim=False)
+    ax.update_datalim([(x0.min(), 0), (x1.max(), 0)], updatey=False); ax.autoscale_view(scaley=False)
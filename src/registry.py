@@ -0,0 +1,172 @@
+# registry.py
+"""
+Process-wide registry of computed results shared by all Streamlit sessions.
+
+Results are keyed by workbook hash + settings. The first request for a key
+computes it; concurrent requests for the same key wait for that one
+computation (single flight) instead of starting their own, and every
+session then shares the same data. NumPy arrays in a result are made
+read-only before they are shared, and every caller gets its own shallow
+copy of the pandas objects. Under copy-on-write (the default from pandas 3,
+switched on at import here on pandas 2.x) the copies share memory and an
+in-place edit copies only the edited columns, so no session can change
+another's data.
+
+A compute() that raises Abandoned (e.g. jobs.Cancelled) is not an error for
+the callers waiting on it: one of them takes over and computes the key.
+
+Each session (owner) holds at most one key per slot ('parse', 'pca', ...);
+taking a new key in a slot releases the old one. Entries nobody holds are
+evicted least recently used first once the registry exceeds MAX_BYTES, and
+owners not seen for OWNER_TTL seconds (closed browser tabs) release all
+their keys.
+"""
+import os, threading, time
+import numpy as np, pandas as pd
+
+MAX_BYTES = int(float(os.environ.get('PCA_APP_REGISTRY_MAX_MB', '2048'))*2**20)
+OWNER_TTL = 3600.0
+
+if int(pd.__version__.split('.')[0]) < 3: pd.set_option('mode.copy_on_write', True)   # _view relies on it
+
+class Abandoned(Exception):
+    """Raised by a compute() that gave up without failing; waiters on the key retry it."""
+
+def _freeze(obj):
+    """Mark NumPy arrays inside `obj` (dicts / tuples / lists nested) read-only, in place."""
+    if isinstance(obj, np.ndarray): obj.flags.writeable = False
+    elif isinstance(obj, dict):
+        for v in obj.values(): _freeze(v)
+    elif isinstance(obj, (list, tuple)):
+        for v in obj: _freeze(v)
+    return obj
+
+def _view(obj):
+    """`obj` with DataFrames / Series (in nested dicts / tuples / lists) replaced by shallow copy-on-write copies."""
+    if isinstance(obj, (pd.DataFrame, pd.Series)): return obj.copy(deep=False)
+    if isinstance(obj, dict): return {k: _view(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)): return type(obj)(_view(v) for v in obj)
+    return obj
+
+def _nbytes(obj) -> int:
+    if isinstance(obj, np.ndarray): return obj.nbytes
+    if isinstance(obj, pd.Index): return int(obj.memory_usage(deep=False))
+    if isinstance(obj, (pd.DataFrame, pd.Series)): return int(np.sum(obj.memory_usage(index=True, deep=False)))
+    if isinstance(obj, dict): return sum(_nbytes(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)): return sum(_nbytes(v) for v in obj)
+    if isinstance(obj, (bytes, bytearray)): return len(obj)
+    return 0
+
+class _Entry:
+    __slots__ = ('value', 'error', 'ready', 'owners', 'nbytes', 'used')
+    def __init__(self):
+        self.value = None; self.error = None; self.ready = threading.Event()
+        self.owners = set(); self.nbytes = 0; self.used = time.time()
+
+class Registry:
+    def __init__(self, max_bytes: int = MAX_BYTES, owner_ttl: float = OWNER_TTL):
+        self.max_bytes = max_bytes; self.owner_ttl = owner_ttl
+        self._entries = {}; self._slots = {}; self._seen = {}; self._lock = threading.Lock()
+        self.hits = self.misses = self.waits = 0
+
+    def get(self, key, compute, owner=None, slot=None):
+        """
+        Value for `key`, computed by compute() at most once at a time across
+        threads. `owner` / `slot` record who holds it (see module docstring).
+        An exception in compute() is raised in every waiting caller and the
+        key is not cached, so the next call retries; after Abandoned the
+        waiters retry at once (one of them becomes the new leader).
+        """
+        while True:
+            with self._lock:
+                self._expire_owners()
+                e = self._entries.get(key); leader = e is None
+                if leader: e = self._entries[key] = _Entry(); self.misses += 1
+                elif e.ready.is_set(): self.hits += 1
+                else: self.waits += 1
+                if owner is not None: self._hold(owner, slot, key, e)
+            if leader:
+                try:
+                    e.value = _freeze(compute()); e.nbytes = _nbytes(e.value)
+                except BaseException as err:
+                    e.error = err
+                    with self._lock:
+                        if self._entries.get(key) is e: del self._entries[key]
+                    raise
+                finally:
+                    e.ready.set()
+                with self._lock: self._evict()
+                break
+            e.ready.wait()
+            if e.error is None: break
+            if not isinstance(e.error, Abandoned): raise e.error
+        e.used = time.time()
+        return _view(e.value)
+
+    def _hold(self, owner, slot, key, e) -> None:
+        self._seen[owner] = time.time()
+        old = self._slots.get((owner, slot))
+        if old is not None and old != key and old in self._entries: self._entries[old].owners.discard(owner)
+        self._slots[(owner, slot)] = key; e.owners.add(owner)
+
+    def hold(self, key, owner, slot=None) -> bool:
+        """Record `owner` as a holder of an existing entry (e.g. one computed by a job another session started)."""
+        with self._lock:
+            e = self._entries.get(key)
+            if e is None or owner is None: return False
+            self._hold(owner, slot, key, e); return True
+
+    def release(self, owner, slot=None) -> None:
+        """Drop `owner`'s hold on `slot` (all slots when slot is None)."""
+        with self._lock:
+            for (o, s), key in list(self._slots.items()):
+                if o == owner and (slot is None or s == slot):
+                    del self._slots[(o, s)]
+                    if key in self._entries: self._entries[key].owners.discard(owner)
+            self._evict()
+
+    def _expire_owners(self) -> None:
+        now = time.time()
+        for owner in [o for o, t in self._seen.items() if now - t > self.owner_ttl]:
+            del self._seen[owner]
+            for (o, s), key in list(self._slots.items()):
+                if o == owner:
+                    del self._slots[(o, s)]
+                    if key in self._entries: self._entries[key].owners.discard(owner)
+
+    def _evict(self) -> None:
+        total = sum(e.nbytes for e in self._entries.values())
+        for key, e in sorted(self._entries.items(), key=lambda kv: kv[1].used):
+            if total <= self.max_bytes: break
+            if e.ready.is_set() and not e.owners:
+                del self._entries[key]; total -= e.nbytes
+
+    def stats(self) -> pd.DataFrame:
+        """One row per entry: key, holders, size (MB), ready flag and idle seconds."""
+        now = time.time()
+        with self._lock:
+            rows = [{'key': repr(k), 'holders': len(e.owners), 'mb': e.nbytes/2**20, 'ready': e.ready.is_set(), 'idle_s': now - e.used}
+                    for k, e in self._entries.items()]
+        return pd.DataFrame(rows, columns=['key', 'holders', 'mb', 'ready', 'idle_s'])
+
+    def clear(self) -> None:
+        with self._lock: self._entries.clear(); self._slots.clear(); self._seen.clear()
+
+REGISTRY = Registry()
+
+def session_id():
+    """Current Streamlit session id (None outside a script run, e.g. in the CLI or a job thread)."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except Exception:
+        return None
+    return ctx.session_id if ctx is not None else None
+
+def shared(key, compute, slot=None, owner=None):
+    """REGISTRY.get held by `owner` (default: the calling session) in `slot`."""
+    return REGISTRY.get(key, compute, owner=owner if owner is not None else session_id(), slot=slot)
+
+def hold(key, slot=None, owner=None) -> bool:
+    """REGISTRY.hold for `owner` (default: the calling session)."""
+    return REGISTRY.hold(key, owner if owner is not None else session_id(), slot=slot)
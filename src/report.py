@@ -0,0 +1,194 @@
+# report.py
+"""
+Multi-page PDF report. Each chart is drawn on a standalone Agg canvas (no
+pyplot state) by a worker process, returned as PNG bytes and cached by a
+fingerprint of its inputs; the pages are then stitched into one PDF.
+The worker pool is created once per process with the forkserver (or spawn)
+start method, so report jobs running on threads never fork the app.
+"""
+import io, multiprocessing, os, threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np, pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.ticker import FuncFormatter
+from PIL import Image
+
+from .analytics import get_analytics, fingerprint
+from .utils import bytes_hash
+from .plots import plot_pc_with_sma
+from .regimes import shade_regime_bands
+from . import contributions
+from .instrument import traced
+
+DPI = 150
+MAX_ENTRIES = 256
+POOL_WORKERS = os.cpu_count() or 1
+MIN_PARALLEL = 3        # fewer figures to draw than this: render in this process
+_memo = OrderedDict(); _lock = threading.Lock()
+_pool = None; _pool_lock = threading.Lock()
+_pct = lambda d: FuncFormatter(lambda y, _: f'{y:.{d}%}')
+
+# ---------------------------
+# Figures (plain data in, Figure out)
+# ---------------------------
+def _fig(w, h, rows=1, cols=1, **kw):
+    fig = Figure(figsize=(w, h)); FigureCanvasAgg(fig)
+    return fig, fig.subplots(rows, cols, **kw)
+
+def _cumulative(cum_strat, cum_bench, regime):
+    fig, ax = _fig(14, 6)
+    shade_regime_bands(ax, regime, alpha=0.28)
+    ax.plot(cum_strat.index, cum_strat, label='PCA Switch (HY/IG)', color='k', lw=2.3)
+    ax.plot(cum_bench.index, cum_bench, label='EMBI GD', color='tab:blue', lw=2)
+    ax.set_title('Cumulative Total Return (Start=1)'); ax.set_ylabel('Growth of $1'); ax.legend()
+    return fig
+
+def _pc(series, sma, regime, title):
+    fig, ax = _fig(14, 4.5)
+    plot_pc_with_sma(ax, series, sma, regime=regime, title=title)
+    return fig
+
+def _loadings(loadings):
+    fig, axes = _fig(16, 6, 1, 2)
+    for ax, col in zip(axes, ['PC1', 'PC2']):
+        s = loadings[col].astype(float).dropna().sort_values(ascending=False)[:20]
+        ax.barh(s.index, s.values, color=np.where(s.values >= 0, 'tab:green', 'tab:red')); ax.axvline(0, color='k', lw=1, alpha=0.7)
+        ax.invert_yaxis(); ax.set_title(f'{col} loadings (latest, sign-adjusted) — Top vars')
+    return fig
+
+def _contributors(C1, C2, date, regime_now):
+    fig, axes = _fig(16, 5, 1, 2)
+    for ax, s, title in [(axes[0], C1.sort_values(ascending=False)[:20], 'PC1 (Risk Appetite) — Top vars'), (axes[1], C2.sort_values(ascending=False)[:20], 'PC2 (Duration Demand) — Top vars')]:
+        ax.barh(s.index, s.values, color=np.where(s.values >= 0, 'tab:green', 'tab:red')); ax.axvline(0, color='k', lw=1, alpha=0.7); ax.invert_yaxis(); ax.set_title(title)
+    fig.suptitle(f'Contributors to SMA(5) scores — {date} ({regime_now})')
+    return fig
+
+def _rolling_excess(roll, cumx):
+    fig, axes = _fig(14, 9, 2, 1, sharex=True)
+    axes[0].plot(roll.index, roll, color='tab:green', lw=2.0, label='12m Rolling Excess (geometric)')
+    axes[0].set_title('12-month Rolling Excess Return — Strategy vs EMBI GD'); axes[0].set_ylabel('Excess return')
+    axes[1].plot(cumx.index, cumx, color='tab:purple', lw=2.2, label='Cumulative Excess (geometric)')
+    axes[1].set_title('Cumulative Excess Return — Strategy vs EMBI GD (from start)'); axes[1].set_ylabel('Cumulative excess')
+    for ax in axes: ax.axhline(0, color='k', lw=1); ax.yaxis.set_major_formatter(_pct(1)); ax.legend(loc='best')
+    return fig
+
+def _te_ir(te_roll, te_over, ir_roll, ir_over):
+    fig, axes = _fig(14, 8, 2, 1, sharex=True, gridspec_kw={'height_ratios': [2, 1], 'hspace': 0.1})
+    axes[0].plot(te_roll.index, te_roll, color='tab:red', lw=2, label='Rolling TE (12m, annualised)')
+    axes[0].axhline(te_over, color='k', lw=1.2, ls='--', label=f'Overall TE = {te_over:.2%}')
+    axes[0].set_title('Tracking Error — Rolling vs Overall (annualised)'); axes[0].set_ylabel('TE'); axes[0].yaxis.set_major_formatter(_pct(2)); axes[0].legend(loc='upper left')
+    axes[1].plot(ir_roll.index, ir_roll, color='tab:purple', lw=2, label=f'Rolling IR (12m); overall IR = {ir_over:.2f}')
+    axes[1].axhline(0, color='k', lw=1); axes[1].set_title('Information Ratio — Rolling (12m)'); axes[1].set_ylabel('IR'); axes[1].legend(loc='upper left')
+    return fig
+
+def _calendar(cal):
+    fig, ax = _fig(14, max(3.0, 0.3*len(cal) + 1.5))
+    ax.axis('off'); ax.set_title('Calendar-year compounded returns (%)')
+    cells = [[f'{v:.2f}' for v in row] for row in cal.to_numpy()*100]
+    t = ax.table(cellText=cells, rowLabels=[str(i) for i in cal.index], colLabels=[str(c) for c in cal.columns], bbox=[0, 0, 1, 1], cellLoc='right')
+    t.auto_set_font_size(False); t.set_fontsize(9)
+    return fig
+
+def _drawdowns(dd_strat, dd_bench):
+    fig, ax = _fig(14, 5)
+    ax.fill_between(dd_bench.index, dd_bench, 0, color='tab:blue', alpha=0.25, label='EMBI GD')
+    ax.plot(dd_strat.index, dd_strat, color='k', lw=1.8, label='PCA Switch (HY/IG)')
+    ax.set_title('Drawdowns from running peak'); ax.yaxis.set_major_formatter(_pct(0)); ax.legend(loc='lower left')
+    return fig
+
+FIGURES = {'cumulative': _cumulative, 'pc': _pc, 'loadings': _loadings, 'contributors': _contributors,
+           'rolling_excess': _rolling_excess, 'te_ir': _te_ir, 'calendar': _calendar, 'drawdowns': _drawdowns}
+
+def render(kind: str, data: dict, dpi: int = DPI) -> bytes:
+    """Draw one FIGURES entry and return it as PNG bytes (runs in worker processes)."""
+    fig = FIGURES[kind](**data); buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=dpi, bbox_inches='tight')
+    return buf.getvalue()
+
+# ---------------------------
+# Report
+# ---------------------------
+def report_specs(returns, regime, PC, Z=None, pca_tl=None, loadings=None) -> list:
+    """(kind, data) per report page, in order; pages whose inputs are missing are left out."""
+    res = get_analytics(returns, regime)
+    te_roll, te_over, ir_roll, ir_over, _, _ = res.te_ir(window=12)
+    specs = [('cumulative', {'cum_strat': res.cum_strat, 'cum_bench': res.cum_bench, 'regime': regime}),
+             ('pc', {'series': PC['PC1'], 'sma': PC['PC1_SMA5'], 'regime': regime, 'title': 'PC1: Monthly Bars with 5M SMA'}),
+             ('pc', {'series': PC['PC2'], 'sma': PC['PC2_SMA5'], 'regime': regime, 'title': 'PC2: Monthly Bars with 5M SMA'})]
+    if loadings is not None and not loadings.dropna(how='all').empty: specs.append(('loadings', {'loadings': loadings}))
+    contrib = contributions.current(Z, pca_tl, PC, regime) if Z is not None and pca_tl is not None else None
+    if contrib is not None: specs.append(('contributors', contrib))
+    specs += [('rolling_excess', {'roll': res.rolling_excess(window=12), 'cumx': res.cumulative_excess}),
+              ('te_ir', {'te_roll': te_roll, 'te_over': te_over, 'ir_roll': ir_roll, 'ir_over': ir_over}),
+              ('calendar', {'cal': res.calendar}),
+              ('drawdowns', {'dd_strat': res.dd_strat, 'dd_bench': res.dd_bench})]
+    return specs
+
+def _key(kind: str, data: dict, dpi: int) -> str:
+    pd_objs = [v for v in data.values() if isinstance(v, (pd.Series, pd.DataFrame))]
+    rest = repr(sorted((k, v) for k, v in data.items() if not isinstance(v, (pd.Series, pd.DataFrame))))
+    return f'{kind}-{dpi}-{fingerprint(*pd_objs)}-{bytes_hash(rest.encode())}'
+
+def _get_pool() -> ProcessPoolExecutor:
+    """The shared render pool, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS, mp_context=multiprocessing.get_context(method))
+        return _pool
+
+def _reset_pool(pool) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is pool: _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+@traced
+def render_all(specs: list, dpi: int = DPI, n_jobs: int = None, progress=None) -> list:
+    """
+    PNG bytes per spec. Figures already rendered with identical inputs come
+    from the process-wide cache; the rest are drawn in the shared process
+    pool (in this process when n_jobs=1 or fewer than MIN_PARALLEL are left).
+    progress(done, total) is called per figure; if it raises, this call's
+    figures not yet started are cancelled.
+    """
+    keys = [_key(kind, data, dpi) for kind, data in specs]
+    with _lock: out = [_memo.get(k) for k in keys]
+    todo = [i for i, b in enumerate(out) if b is None]
+    tick = (lambda: progress(sum(b is not None for b in out), len(out))) if progress else (lambda: None)
+    tick()
+    n_jobs = min(len(todo), n_jobs or POOL_WORKERS)
+    if n_jobs > 1 and len(todo) >= MIN_PARALLEL:
+        pool = _get_pool(); futs = {pool.submit(render, *specs[i], dpi): i for i in todo}
+        try:
+            for f in as_completed(futs): out[futs[f]] = f.result(); tick()
+        except BrokenProcessPool:
+            _reset_pool(pool); raise
+        except BaseException:
+            for f in futs: f.cancel()
+            raise
+    else:
+        for i in todo: out[i] = render(*specs[i], dpi=dpi); tick()
+    with _lock:
+        for k, b in zip(keys, out): _memo[k] = b; _memo.move_to_end(k)
+        while len(_memo) > MAX_ENTRIES: _memo.popitem(last=False)
+    return out
+
+def clear_cache() -> None:
+    with _lock: _memo.clear()
+
+@traced
+def assemble_pdf(pngs: list, dpi: int = DPI) -> bytes:
+    """One PDF page per PNG (images embedded as rendered, no resampling)."""
+    pages = [Image.open(io.BytesIO(b)).convert('RGB') for b in pngs]; buf = io.BytesIO()
+    pages[0].save(buf, format='PDF', save_all=True, append_images=pages[1:], resolution=dpi)
+    return buf.getvalue()
+
+@traced
+def build_report(returns, regime, PC, Z=None, pca_tl=None, loadings=None, dpi: int = DPI, n_jobs: int = None, progress=None) -> bytes:
+    """Full PDF report: PCs, loadings, contributors, cumulative/rolling excess, TE/IR, calendar table, drawdowns."""
+    return assemble_pdf(render_all(report_specs(returns, regime, PC, Z, pca_tl, loadings), dpi, n_jobs, progress), dpi)
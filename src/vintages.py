@@ -0,0 +1,165 @@
+# vintages.py
+"""
+Vintage store: many workbook vintages' Z matrices aligned on the union of
+dates and factors in one (vintage x date x factor) .npy file that every
+process memory-maps (the OS shares the pages; nothing is pickled or copied
+per worker). PCA results are written by the workers straight into
+(vintage x date) memory-mapped outputs next to it.
+
+    store = build_vintage_store(paths, 'vintage_store', n_jobs=8)
+    store.run_pca(n_jobs=8)
+    cmp = store.compare()          # regime flips and PC drift vs the latest vintage
+
+Stored directly under the disk cache directory (page 10) a store is an
+ordinary cache entry: its meta.json marks it, it counts against the cache
+size limit and is evicted least recently used first.
+"""
+import json, os, shutil, uuid, warnings
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np, pandas as pd
+from numpy.lib.format import open_memmap
+
+from . import data_ingest, pca as pca_mod, regimes as regimes_mod
+from .utils import bytes_hash
+from .instrument import traced
+
+DZ_BLOCK = 256      # dates per block when compare() scans the Z panel
+
+def _write_meta(root: str, meta: dict) -> None:
+    tmp = os.path.join(root, f'.meta-{uuid.uuid4().hex}.json')
+    with open(tmp, 'w', encoding='utf-8') as fh: json.dump(meta, fh)
+    os.replace(tmp, os.path.join(root, 'meta.json'))
+
+def _parse(src, minp_z: int):
+    """Z of one vintage from a path or workbook bytes (runs in worker processes)."""
+    if isinstance(src, (str, os.PathLike)):
+        with open(src, 'rb') as fh: src = fh.read()
+    return bytes_hash(src), data_ingest.parse_workbook(src, prefer_raw=True, minp_z=minp_z)[1]
+
+@traced
+def build_vintage_store(sources, root: str, names=None, minp_z: int = 24, n_jobs: int = 1) -> 'VintageStore':
+    """
+    Parse workbooks (paths or bytes, oldest vintage first) and write them as
+    one aligned panel under `root` (replacing any store there). Per vintage
+    the dates and factors it actually had are recorded, so missing cells
+    stay NaN rather than being filled. The store is written to a temp dir
+    and renamed into place, so concurrent builders never see a partial one.
+    """
+    sources = list(sources)
+    names = list(names) if names is not None else [os.path.basename(str(s)) if isinstance(s, (str, os.PathLike)) else f'v{i}' for i, s in enumerate(sources)]
+    if n_jobs > 1 and len(sources) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as ex: parsed = list(ex.map(_parse, sources, [minp_z]*len(sources)))
+    else:
+        parsed = [_parse(s, minp_z) for s in sources]
+    dates = pd.DatetimeIndex(sorted(set().union(*[Z.index for _, Z in parsed])))
+    factors = list(dict.fromkeys(c for _, Z in parsed for c in Z.columns))
+    parent = os.path.dirname(os.path.abspath(root)); os.makedirs(parent, exist_ok=True)
+    final, root = root, os.path.join(parent, f'.tmp-{uuid.uuid4().hex}'); os.makedirs(root)
+    V, T, N = len(parsed), len(dates), len(factors)
+    z = open_memmap(os.path.join(root, 'z.npy'), mode='w+', dtype=np.float64, shape=(V, T, N))
+    rows = np.zeros((V, T), bool); cols = np.zeros((V, N), bool)
+    for v, (_, Z) in enumerate(parsed):
+        r = dates.get_indexer(Z.index); c = pd.Index(factors).get_indexer(Z.columns)
+        z[v] = np.nan; z[v][np.ix_(r, c)] = Z.to_numpy(dtype=float); rows[v, r] = True; cols[v, c] = True
+    z.flush(); del z
+    np.save(os.path.join(root, 'rows.npy'), rows); np.save(os.path.join(root, 'cols.npy'), cols)
+    for name, shape, dtype, fill in [('pc', (V, T, 2), np.float64, np.nan), ('regime', (V, T), np.int8, -1)]:
+        a = open_memmap(os.path.join(root, f'{name}.npy'), mode='w+', dtype=dtype, shape=shape); a[:] = fill; a.flush(); del a
+    meta = {'vintages': names, 'hashes': [h for h, _ in parsed], 'dates': [d.isoformat() for d in dates],
+            'factors': [str(f) for f in factors], 'minp_z': minp_z, 'pca_done': False}
+    with open(os.path.join(root, 'meta.json'), 'w', encoding='utf-8') as fh: json.dump(meta, fh)
+    if os.path.isdir(final): shutil.rmtree(final, ignore_errors=True)
+    try:
+        os.replace(root, final)
+    except OSError:
+        shutil.rmtree(root, ignore_errors=True)      # another builder renamed its store into place first
+    return VintageStore(final)
+
+def _pca_one(root: str, v: int, cfg: dict) -> int:
+    """Expanding PCA + regimes of vintage v, written into the shared pc / regime arrays (worker side)."""
+    st = VintageStore(root)
+    Z = st.frame(v); tl = pca_mod.pca_timeline(Z, **cfg)
+    PC, _, _ = pca_mod.pca_frames(tl); codes = regimes_mod.regime_codes(regimes_mod.compute_regime(PC))
+    r = st.rows[v]
+    pc = open_memmap(os.path.join(root, 'pc.npy'), mode='r+'); reg = open_memmap(os.path.join(root, 'regime.npy'), mode='r+')
+    pc[v][r] = PC[['PC1', 'PC2']].to_numpy(); reg[v][r] = codes
+    pc.flush(); reg.flush()
+    return v
+
+class VintageStore:
+    """Read-only view of a store written by build_vintage_store (arrays are memory-mapped)."""
+    def __init__(self, root: str):
+        self.root = root
+        mpath = os.path.join(root, 'meta.json')
+        with open(mpath, 'r', encoding='utf-8') as fh: self.meta = json.load(fh)
+        try: os.utime(mpath, None)      # LRU timestamp, as cache.load
+        except OSError: pass
+        self.vintages = self.meta['vintages']; self.dates = pd.DatetimeIndex(self.meta['dates']); self.factors = pd.Index(self.meta['factors'])
+        self.z = np.load(os.path.join(root, 'z.npy'), mmap_mode='r')
+        self.rows = np.load(os.path.join(root, 'rows.npy')); self.cols = np.load(os.path.join(root, 'cols.npy'))
+
+    def __len__(self): return len(self.vintages)
+
+    def _v(self, v) -> int: return self.vintages.index(v) if isinstance(v, str) else int(v) % len(self)
+
+    def frame(self, v) -> pd.DataFrame:
+        """Z of one vintage on its own dates / factors (as the app would have loaded it)."""
+        v = self._v(v); r, c = self.rows[v], self.cols[v]
+        return pd.DataFrame(self.z[v][np.ix_(r, c)], index=self.dates[r], columns=self.factors[c])
+
+    @property
+    def pc(self) -> np.ndarray: return np.load(os.path.join(self.root, 'pc.npy'), mmap_mode='r')
+    @property
+    def regime(self) -> np.ndarray: return np.load(os.path.join(self.root, 'regime.npy'), mmap_mode='r')
+
+    @traced
+    def run_pca(self, cfg: dict = None, n_jobs: int = 1) -> None:
+        """Expanding PCA and regimes for every vintage; workers only receive (root, vintage) and share the memmaps."""
+        cfg = dict(pca_mod.DEFAULT_CONFIG if cfg is None else cfg); V = list(range(len(self)))
+        if n_jobs > 1 and len(V) > 1:
+            with ProcessPoolExecutor(max_workers=n_jobs) as ex: list(ex.map(_pca_one, [self.root]*len(V), V, [cfg]*len(V)))
+        else:
+            for v in V: _pca_one(self.root, v, cfg)
+        self.meta['pca_done'] = True; _write_meta(self.root, self.meta)
+
+    def _max_abs_dz(self, b: int) -> np.ndarray:
+        """Per vintage, max |z - z(base)| over shared dates and factors, read DZ_BLOCK dates at a time."""
+        out = np.full(len(self), np.nan); zb = self.z[b]
+        for v in range(len(self)):
+            r = np.flatnonzero(self.rows[v] & self.rows[b]); c = np.flatnonzero(self.cols[v] & self.cols[b])
+            if not len(c): continue
+            for i in range(0, len(r), DZ_BLOCK):
+                ix = np.ix_(r[i:i+DZ_BLOCK], c)
+                out[v] = np.fmax(out[v], np.nanmax(np.abs(self.z[v][ix] - zb[ix])))
+        return out
+
+    @traced
+    def compare(self, base=-1) -> dict:
+        """
+        Bulk comparison of every vintage against `base` (default: latest), on the
+        dates both have:
+          'summary'   per vintage: dates compared, regime flips (count, share,
+                      first / last date), PC1/PC2 mean and max |drift|, max |dZ|;
+          'regime'    date x vintage labels; 'changed' date x vintage bool;
+          'pc1_drift' / 'pc2_drift'  date x vintage PC - PC(base).
+        """
+        if not self.meta.get('pca_done'): self.run_pca()
+        b = self._v(base); pc = np.asarray(self.pc); reg = np.asarray(self.regime)
+        both = self.rows & self.rows[b]                                    # (V, T)
+        valid = both & (reg >= 0) & (reg[b] >= 0)
+        changed = valid & (reg != reg[b])
+        drift = np.where(both[..., None], pc - pc[b], np.nan)             # (V, T, 2)
+        with np.errstate(invalid='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)      # all-NaN rows (no overlap with base)
+            n_cmp = valid.sum(axis=1); n_chg = changed.sum(axis=1)
+            summary = pd.DataFrame({
+                'dates': n_cmp, 'regime_flips': n_chg, 'flip_share': np.where(n_cmp > 0, n_chg/np.maximum(n_cmp, 1), np.nan),
+                'first_flip': [self.dates[np.argmax(c)] if c.any() else pd.NaT for c in changed],
+                'last_flip': [self.dates[len(c)-1-np.argmax(c[::-1])] if c.any() else pd.NaT for c in changed],
+                'pc1_mean_abs_drift': np.nanmean(np.abs(drift[..., 0]), axis=1), 'pc1_max_abs_drift': np.nanmax(np.abs(drift[..., 0]), axis=1),
+                'pc2_mean_abs_drift': np.nanmean(np.abs(drift[..., 1]), axis=1), 'pc2_max_abs_drift': np.nanmax(np.abs(drift[..., 1]), axis=1),
+                'max_abs_dz': self._max_abs_dz(b)}, index=pd.Index(self.vintages, name='vintage'))
+        labels = np.where(reg >= 0, np.array(regimes_mod.REGIMES, dtype=object)[np.clip(reg, 0, None)], None)
+        frame = lambda a: pd.DataFrame(a.T, index=self.dates, columns=self.vintages)
+        return {'base': self.vintages[b], 'summary': summary, 'regime': frame(labels), 'changed': frame(changed),
+                'pc1_drift': frame(drift[..., 0]), 'pc2_drift': frame(drift[..., 1])}
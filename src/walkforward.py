@@ -0,0 +1,122 @@
+# walkforward.py
+"""
+Walk-forward evaluation of the PCA regime switch: PCA -> regimes -> HY/IG
+switch over rolling (or anchored) train/test splits, one score row per fold.
+
+Running sums of the (shifted) factor rows are taken once at every fold
+boundary; a train window's mean/covariance is then a difference of two
+prefix sums, so no fold refits its history from scratch.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np, pandas as pd
+from . import pca as pca_mod
+from .regimes import regime_codes_from_sma, RISK_ON_CODES
+from .instrument import traced
+
+def make_folds(n: int, train: int = 120, test: int = 12, step: int = None, anchored: bool = False) -> np.ndarray:
+    """(a, b, e) row positions per fold: train rows [a, b), test rows [b, e). step defaults to test."""
+    step = step or test
+    return np.array([(0 if anchored else b-train, b, min(b+test, n)) for b in range(train, n, step)], dtype=int).reshape(-1, 3)
+
+def _prefix_sums(D: np.ndarray, at: np.ndarray):
+    """Sums and cross-product sums of D[:p] for each sorted position p in `at` (one GEMM per segment)."""
+    N = D.shape[1]; s = np.zeros((len(at), N)); S = np.zeros((len(at), N, N)); prev = 0
+    for i, p in enumerate(at):
+        seg = D[prev:p]
+        s[i] = (s[i-1] if i else 0) + seg.sum(axis=0); S[i] = (S[i-1] if i else 0) + seg.T @ seg; prev = p
+    return s, S
+
+def _score(strat: np.ndarray, bench: np.ndarray, w: np.ndarray) -> dict:
+    ok = ~np.isnan(strat) & ~np.isnan(bench); s, b = strat[ok], bench[ok]; n = int(ok.sum())
+    if n == 0: return {'n_months': 0}
+    act = s - b; te = act.std(ddof=1)*np.sqrt(12) if n > 1 else np.nan
+    growth = np.cumprod(1+s); ann_s, ann_b = s.mean()*12, b.mean()*12
+    return {'n_months': n, 'ann_strat': ann_s, 'ann_bench': ann_b, 'ann_excess': ann_s-ann_b, 'te': te,
+            'ir': (ann_s-ann_b)/te if te > 0 else np.nan, 'hit_rate': float((act > 0).mean()),
+            'max_dd': float((growth/np.maximum.accumulate(growth) - 1).min()),
+            'switches': int(np.abs(np.diff(w[ok])).sum()) if n > 1 else 0}
+
+def _fold_chunk(X, hy, ig, bench, folds, s0, S0, s1, S1, c, ie, iy, k, orient, solver, mode, sma, lag):
+    """
+    Score folds [(a, b, e), ...]. (s0, S0) are the prefix sums at a; (s1, S1) at
+    b for mode='frozen', else at the start of the score window (b - sma - lag + 1,
+    clipped to a: the SMA / signal warm-up rows).
+    """
+    out = []; pre = sma + lag - 1
+    if mode == 'frozen':
+        # one batched eigensolve for every fold's train window
+        n = (folds[:, 1] - folds[:, 0]).astype(float)
+        sw, Sw = s1 - s0, S1 - S0; m = sw/n[:, None]
+        cov = (Sw - n[:, None, None]*m[:, :, None]*m[:, None, :])/(n-1)[:, None, None]
+        _, V, _ = pca_mod._top_k(cov, k, solver)
+        V = V*np.where(pca_mod.orient_flips(cov, V, ie, iy, orient), -1.0, 1.0)[:, None, :]
+    for f, (a, b, e) in enumerate(folds):
+        w0 = max(a, b - pre)
+        if mode == 'frozen':
+            scores = (X[w0:e] - (m[f] + c)) @ V[f]
+        else:
+            # expanding from a: continue the train window's moments through the score window
+            state = {'n': int(w0 - a), 'c': c, 's': s1[f] - s0[f], 'S': S1[f] - S0[f]}
+            tl = pca_mod._fit(X[w0:e], ie, iy, k, orient, state, solver, pca_mod.SOLVER_TOL)
+            scores = tl['scores']
+        sm = pd.DataFrame(scores[:, :2]).rolling(sma, min_periods=sma).mean().to_numpy()
+        codes = regime_codes_from_sma(sm[:, 0], sm[:, 1])
+        t = np.arange(b - w0, e - w0); src = t - lag
+        sig = np.where(src >= 0, codes[np.clip(src, 0, None)], -1)
+        w = np.isin(sig, RISK_ON_CODES).astype(float)
+        strat = w*hy[b:e] + (1.0-w)*ig[b:e]
+        out.append({'a': a, 'b': b, 'e': e, 'regime_at_start': int(sig[0]), **_score(strat, bench[b:e], w)})
+    return out
+
+@traced
+def walk_forward(Z: pd.DataFrame, returns: pd.DataFrame, train: int = 120, test: int = 12, step: int = None,
+                 anchored: bool = False, mode: str = 'frozen', sma: int = 5, lag: int = 1, k: int = 2,
+                 orient: str = 'corr', solver: str = 'auto', n_jobs: int = 1, chunk: int = 64) -> pd.DataFrame:
+    """
+    Out-of-sample folds of the PCA regime switch over the complete rows of Z.
+
+    Each fold fits PCA on `train` rows (all rows so far with anchored=True),
+    then trades the `test` rows that follow:
+      mode='frozen'    test scores are projections on the train-end mean and
+                       loadings (parameters fixed out of sample);
+      mode='expanding' the PCA keeps expanding through the test rows from the
+                       fold's train start, exactly as the live pipeline does.
+    Regimes are SMA(`sma`) classifications of those scores; the signal is
+    lagged `lag` months (the first test month trades the last train regime).
+    Folds run in a process pool in chunks when n_jobs > 1.
+    Returns one row per fold: dates, months traded, annualised strategy /
+    benchmark / excess return, TE, IR, hit rate, max drawdown and switches.
+    """
+    if mode not in ('frozen', 'expanding'): raise ValueError(f"Unknown mode {mode!r}; use 'frozen' or 'expanding'.")
+    if int(lag) != lag or lag < 1: raise ValueError(f"lag must be a whole number of months >= 1 (lag 0 would trade on the same month's regime), got {lag}.")
+    if train < sma + lag: raise ValueError(f'train ({train}) must cover the SMA window plus lag ({sma + lag}).')
+    k = min(k, Z.shape[1])
+    ie = Z.columns.get_loc(pca_mod._anchor(Z, pca_mod.EQUITY_CANDIDATES)); iy = Z.columns.get_loc(pca_mod._anchor(Z, pca_mod.YIELD_CANDIDATES))
+    Zc = Z.dropna(how='any'); X = Zc.to_numpy(dtype=float)
+    ret = returns.reindex(Zc.index)[['HY', 'IG', 'EMBI']].to_numpy(dtype=float)
+    folds = make_folds(len(X), train, test, step, anchored)
+    cols = ['fold', 'train_start', 'train_end', 'test_start', 'test_end', 'n_months', 'ann_strat', 'ann_bench',
+            'ann_excess', 'te', 'ir', 'hit_rate', 'max_dd', 'switches', 'regime_at_start']
+    if not len(folds): return pd.DataFrame(columns=cols)
+
+    # shared prefix sums at every fold start and at the end of what each fold fits:
+    # the train window (frozen) or the rows before its score window (expanding)
+    c = X[0]
+    ends = folds[:, 1] if mode == 'frozen' else np.maximum(folds[:, 0], folds[:, 1] - (sma + lag - 1))
+    at, inv = np.unique(np.r_[folds[:, 0], ends], return_inverse=True)
+    s, S = _prefix_sums(X - c, at)
+    i0, i1 = inv[:len(folds)], inv[len(folds):]
+
+    parts = [slice(i, i+chunk) for i in range(0, len(folds), chunk)]
+    args = lambda p: (X, ret[:, 0], ret[:, 1], ret[:, 2], folds[p], s[i0[p]], S[i0[p]], s[i1[p]], S[i1[p]],
+                      c, ie, iy, k, orient, solver, mode, sma, lag)
+    if n_jobs > 1 and len(parts) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as ex:
+            rows = [r for out in ex.map(_fold_chunk, *zip(*[args(p) for p in parts])) for r in out]
+    else:
+        rows = [r for p in parts for r in _fold_chunk(*args(p))]
+    df = pd.DataFrame(rows); idx = Zc.index
+    df['fold'] = np.arange(len(df))
+    df['train_start'] = idx[df['a']]; df['train_end'] = idx[df['b'] - 1]
+    df['test_start'] = idx[df['b']]; df['test_end'] = idx[df['e'] - 1]
+    return df.reindex(columns=cols)
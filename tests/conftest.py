@@ -0,0 +1,17 @@
+# conftest.py
+import os, sys, tempfile
+import numpy as np, pandas as pd, pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('PCA_APP_CACHE_DIR', tempfile.mkdtemp(prefix='pca_regime_test_'))
+
+def panel(T: int = 72, N: int = 8, seed: int = 0) -> pd.DataFrame:
+    """Factor-driven z-score panel with the equity / yield anchors as its first two columns."""
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((T, 3)) @ rng.standard_normal((3, N)) + 0.3*rng.standard_normal((T, N))
+    cols = ['SPX Index', 'USGG10Y Index'] + [f'F{i:03d} Index' for i in range(N - 2)]
+    return pd.DataFrame(X, index=pd.date_range('2000-01-31', periods=T, freq='ME'), columns=cols)
+
+@pytest.fixture
+def Z() -> pd.DataFrame:
+    return panel()
@@ -0,0 +1,40 @@
+# test_backtest.py
+import numpy as np, pandas as pd, pytest
+from src import backtest, metrics, regimes
+
+@pytest.fixture
+def inputs():
+    rng = np.random.default_rng(0); T = 240; idx = pd.date_range('1995-01-31', periods=T, freq='ME')
+    PC = pd.DataFrame(rng.standard_normal((T, 2)), index=idx, columns=['PC1', 'PC2']); PC.iloc[0] = np.nan; PC.iloc[100:103] = np.nan
+    R = pd.DataFrame(rng.normal(0.005, 0.02, (T, 3)), index=idx, columns=['HY', 'IG', 'EMBI'])
+    return R, PC
+
+def _live(R, PC, w=5, lag=1):
+    """hy_ig_strategy on compute_regime(PC).dropna(), as the app runs it (w, lag generalise it for the sweep)."""
+    P = PC.assign(PC1_SMA5=PC['PC1'].rolling(w, min_periods=w).mean(), PC2_SMA5=PC['PC2'].rolling(w, min_periods=w).mean())
+    reg = regimes.compute_regime(P).dropna()
+    if lag == 1: return backtest.hy_ig_strategy(R, reg)
+    r = R.loc[reg.index]; wh = reg.shift(lag).isin(['Goldilocks', 'Reflation']).astype(float)
+    return {'strat_ret': wh*r['HY'] + (1-wh)*r['IG'], 'bench_ret': r['EMBI']}
+
+def test_default_sweep_matches_hy_ig_strategy(inputs):
+    R, PC = inputs; res = _live(R, PC); row = backtest.hy_ig_sweep(R, PC).iloc[0]
+    _, te, _, ir, ann_s, ann_b = metrics.rolling_te_ir(res['strat_ret'], res['bench_ret'])
+    assert row['n_months'] == len(res['strat_ret'])
+    np.testing.assert_allclose([row['ann_strat'], row['ann_bench'], row['te'], row['ir'], row['max_dd']],
+                               [ann_s, ann_b, te, ir, res['dd_strat'].min()], rtol=1e-10)
+    assert row['switches'] == res['w_hy'].diff().abs().sum()
+
+@pytest.mark.parametrize('w, lag', [(3, 1), (7, 2), (12, 3)])
+def test_sweep_configs_match_live_path(inputs, w, lag):
+    R, PC = inputs; res = _live(R, PC, w, lag)
+    row = backtest.hy_ig_sweep(R, PC, sma_windows=(w,), lags=(lag,)).iloc[0]
+    np.testing.assert_allclose(row['ann_strat'], res['strat_ret'].mean()*12, rtol=1e-10)
+
+def test_sweep_chunks_and_pool_agree(inputs):
+    R, PC = inputs; grid = dict(sma_windows=range(3, 9), lags=(1, 2), costs=(0.0, 0.001))
+    pd.testing.assert_frame_equal(backtest.hy_ig_sweep(R, PC, **grid), backtest.hy_ig_sweep(R, PC, **grid, chunk=5, n_jobs=2))
+
+@pytest.mark.parametrize('lags', [(0,), (1, 0), (1.5,)])
+def test_sweep_rejects_bad_lags(inputs, lags):
+    with pytest.raises(ValueError): backtest.hy_ig_sweep(*inputs, lags=lags)
@@ -0,0 +1,25 @@
+# test_ingest.py
+import datetime as dt, io
+import numpy as np, pandas as pd, pytest
+from openpyxl import Workbook
+from benchmarks.synthetic import make_workbook
+from src import data_ingest
+
+def _raw_only() -> bytes:
+    """Inputs + Returns tabs only: mid-month dates, a late-starting series, an integer column and a '#N/A'."""
+    rng = np.random.default_rng(0); wb = Workbook(); ws = wb.active; ws.title = 'Inputs'
+    ws.append(['Date', 'A', 'B', 'C'])
+    for i in range(60): ws.append([dt.datetime(2000 + i//12, i%12 + 1, 15), float(rng.standard_normal()), float(rng.standard_normal()) if i > 10 else None, int(rng.integers(0, 10))])
+    ws = wb.create_sheet('Returns'); ws.append(['Date'] + ['EMBI GD HY', 'EMBI GD IG', 'EMBI GD']*2)
+    for i in range(60): ws.append([dt.datetime(2000 + i//12, i%12 + 1, 28), 100, 100, 100, 0.01, '#N/A' if i == 3 else 0.02, 0.0])
+    buf = io.BytesIO(); wb.save(buf); return buf.getvalue()
+
+@pytest.mark.parametrize('backend', ['openpyxl', 'calamine'])
+@pytest.mark.parametrize('xls, kw', [(make_workbook(60, 5), {}), (make_workbook(130, 12, seed=1), {}), (make_workbook(90, 6), {'prefer_raw': False}),
+                                      (_raw_only(), {'minp_z': 12})])
+def test_parse_workbook_matches_pandas_loaders(xls, kw, backend):
+    if backend == 'calamine': pytest.importorskip('python_calamine')
+    xf = data_ingest.read_excel_bytes(xls)
+    sheets, Z, R = data_ingest.parse_workbook(xls, backend=backend, **kw)
+    pd.testing.assert_frame_equal(Z, data_ingest.load_variables(xf, **kw))
+    pd.testing.assert_frame_equal(R, data_ingest.load_returns(xf))
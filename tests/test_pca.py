@@ -0,0 +1,53 @@
+# test_pca.py
+import numpy as np, pandas as pd, pytest
+from src import pca as pca_mod
+
+def _sklearn_expanding(Z: pd.DataFrame):
+    """The original per-month implementation: refit sklearn PCA on Z[:t+1], orient by history correlation."""
+    PCA = pytest.importorskip('sklearn.decomposition').PCA
+    eq = pca_mod._anchor(Z, pca_mod.EQUITY_CANDIDATES); yld = pca_mod._anchor(Z, pca_mod.YIELD_CANDIDATES)
+    T = len(Z); pc = np.full((T, 2), np.nan); evr = np.full((T, 2), np.nan); load = None
+    for t in range(1, T):
+        Zi = Z.iloc[:t+1]; p = PCA(n_components=2).fit(Zi.values); hist = pd.DataFrame(p.transform(Zi.values), index=Zi.index)
+        sign = np.array([-1.0 if hist[0].corr(Zi[eq]) < 0 else 1.0, -1.0 if hist[1].corr(-Zi[yld]) < 0 else 1.0])
+        pc[t] = hist.iloc[-1].to_numpy()*sign; evr[t] = p.explained_variance_ratio_; load = p.components_.T*sign
+    return pc, evr, load
+
+def test_expanding_pca_2_matches_per_month_sklearn(Z):
+    pc, evr, load = _sklearn_expanding(Z)
+    PC, EVR, L = pca_mod.expanding_pca_2(Z, solver='eigh')
+    np.testing.assert_allclose(PC[['PC1', 'PC2']].to_numpy(), pc, atol=1e-8)
+    np.testing.assert_allclose(EVR[['PC1_EVR', 'PC2_EVR']].to_numpy(), evr, atol=1e-10)
+    np.testing.assert_allclose(L[['PC1', 'PC2']].to_numpy(dtype=float), load, atol=1e-8)
+    pd.testing.assert_series_equal(PC['PC1_SMA5'], PC['PC1'].rolling(5, min_periods=5).mean(), check_names=False)
+
+@pytest.mark.parametrize('cfg', [{}, {'window': 24}, {'missing': 'pairwise'}])
+def test_pca_append_matches_full_fit(Z, cfg):
+    full = pca_mod.pca_timeline(Z, solver='eigh', **cfg)
+    res = pca_mod.pca_append(pca_mod.pca_timeline(Z.iloc[:50], solver='eigh', **cfg), Z, solver='eigh', **cfg)
+    for n in ('scores', 'evr', 'loadings'): np.testing.assert_allclose(res[n], full[n], atol=1e-10, equal_nan=True)
+    np.testing.assert_array_equal(res['valid'], full['valid']); np.testing.assert_array_equal(res['flips'], full['flips'])
+
+def test_pca_append_rejects_edited_history(Z):
+    res = pca_mod.pca_timeline(Z.iloc[:50])
+    edited = Z.copy(); edited.iloc[10, 3] += 1.0
+    assert pca_mod.pca_append(res, edited) is None
+    assert pca_mod.pca_append(res, Z, window=24) is None
+
+def test_rolling_matches_refit_on_window(Z):
+    w = 24; res = pca_mod.pca_timeline(Z, solver='eigh', window=w)
+    assert not res['valid'][:w-1].any() and res['valid'][w-1:].all()
+    for t in (w-1, 40, len(Z)-1):
+        X = Z.iloc[t-w+1:t+1].to_numpy(); vals, vecs = np.linalg.eigh(np.cov(X, rowvar=False))
+        np.testing.assert_allclose(res['evr'][t], vals[::-1][:2]/vals.sum(), atol=1e-10)
+        np.testing.assert_allclose(np.abs(res['loadings'][t]), np.abs(vecs[:, ::-1][:, :2]), atol=1e-8)
+
+def test_pairwise_equals_drop_on_complete_panel(Z):
+    a = pca_mod.pca_timeline(Z, solver='eigh'); b = pca_mod.pca_timeline(Z, solver='eigh', missing='pairwise')
+    np.testing.assert_allclose(a['scores'], b['scores'], atol=1e-8, equal_nan=True)
+
+def test_iterative_solvers_within_tolerance(Z):
+    ref = pca_mod.pca_timeline(Z, solver='eigh')
+    for solver in ('randomized', 'auto'):
+        res = pca_mod.pca_timeline(Z, solver=solver)
+        np.testing.assert_allclose(res['evr'], ref['evr'], atol=1e-6, equal_nan=True)